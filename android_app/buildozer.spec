@@ -16,13 +16,13 @@ source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,json
 
 # (list) List of inclusions using pattern matching
-source.include_patterns = ../bybit_client_lite.py,../twin_range_filter_lite.py
+source.include_patterns = bybitbot/*.py
 
 # (str) Application versioning (method 1)
 version = 1.0
 
 # (list) Application requirements
-requirements = python3==3.9.9,hostpython3==3.9.9,kivy==2.1.0,requests,urllib3
+requirements = python3==3.9.9,hostpython3==3.9.9,kivy==2.1.0,numpy,requests,urllib3
 
 # (str) Supported orientation (landscape, sensorLandscape, portrait or all)
 orientation = portrait
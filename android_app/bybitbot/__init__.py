@@ -0,0 +1,3 @@
+"""
+Bot components bundled with the Android app
+"""
@@ -7,14 +7,31 @@ import time
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
 import urllib3
+from urllib3.util.retry import Retry
+
+# Faster response parsing when orjson is available
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Shared keep-alive session so every call reuses pooled TCP/TLS connections
+# (Retry only covers idempotent methods, so orders are never resent)
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -77,9 +94,9 @@ class BybitClientLite:
         
         try:
             if method == 'GET':
-                response = requests.get(url, params=params, headers=headers, timeout=10, verify=False)
+                response = _SESSION.get(url, params=params, headers=headers, timeout=10, verify=False)
             else:
-                response = requests.post(url, json=params, headers=headers, timeout=10, verify=False)
+                response = _SESSION.post(url, json=params, headers=headers, timeout=10, verify=False)
             
             # Check if response is empty
             if not response.text:
@@ -88,7 +105,7 @@ class BybitClientLite:
             
             # Try to parse JSON
             try:
-                data = response.json()
+                data = _loads(response.content)
             except ValueError as e:
                 logger.error(f"Invalid JSON response: {response.text[:200]}")
                 return {'retCode': -1, 'retMsg': f'Invalid JSON: {str(e)}'}
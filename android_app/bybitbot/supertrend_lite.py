@@ -0,0 +1,123 @@
+"""
+Lightweight Supertrend Indicator - No pandas required
+Uses float32 NumPy arrays for the element-wise math
+"""
+
+import numpy as np
+
+
+def calculate_atr(high_prices, low_prices, close_prices, period=10):
+    """
+    Calculate Average True Range (ATR)
+    
+    Args:
+        high_prices: Array of high prices
+        low_prices: Array of low prices
+        close_prices: Array of close prices
+        period: ATR period (default: 10)
+    
+    Returns:
+        Array of ATR values
+    """
+    n = len(high_prices)
+    if n < 2:
+        return np.zeros(n, dtype=np.float32)
+    
+    # Calculate True Range for each candle (first TR is just high - low)
+    prev_close = close_prices[:-1]
+    tr = np.empty(n, dtype=np.float32)
+    tr[0] = high_prices[0] - low_prices[0]
+    tr[1:] = np.maximum.reduce([
+        high_prices[1:] - low_prices[1:],
+        np.abs(high_prices[1:] - prev_close),
+        np.abs(low_prices[1:] - prev_close)
+    ])
+    
+    # Calculate ATR using RMA (exponential moving average). This is a
+    # recurrence, so it runs over plain floats rather than array scalars.
+    alpha = 1.0 / period
+    atr = tr.tolist()
+    for i in range(1, n):
+        atr[i] = (atr[i] * alpha) + (atr[i-1] * (1 - alpha))
+    
+    return np.array(atr, dtype=np.float32)
+
+
+def calculate_supertrend(ohlc, atr_period=10, factor=3.0):
+    """
+    Calculate Supertrend signals from candle data
+    
+    Args:
+        ohlc: N x 4 array (or list of lists) of candles [[open, high, low, close], ...]
+        atr_period: ATR period (default: 10)
+        factor: Multiplier for ATR (default: 3.0)
+    
+    Returns:
+        dict with 'long_signal', 'short_signal', 'supertrend_value', 'direction'
+    """
+    if len(ohlc) < atr_period * 2:
+        return {
+            'long_signal': False,
+            'short_signal': False,
+            'supertrend_value': 0,
+            'direction': 0,
+            'current_price': 0
+        }
+    
+    # Extract price data (float32 is plenty for ATR over a few hundred bars)
+    arr = np.asarray(ohlc, dtype=np.float32)
+    high_prices = arr[:, 1]
+    low_prices = arr[:, 2]
+    close_prices = arr[:, 3]
+    
+    # Calculate ATR
+    atr = calculate_atr(high_prices, low_prices, close_prices, atr_period)
+    
+    # Calculate HL2 and basic bands
+    hl2 = (high_prices + low_prices) * np.float32(0.5)
+    band = atr * np.float32(factor)
+    basic_upperband = (hl2 + band).tolist()
+    basic_lowerband = (hl2 - band).tolist()
+    closes = close_prices.tolist()
+    
+    # Final bands and direction in a single pass. The supertrend line sits on
+    # the upper band while direction is -1 and on the lower band while it is 1.
+    final_upperband = basic_upperband[0]
+    final_lowerband = basic_lowerband[0]
+    direction = [-1]  # Start with downtrend
+    
+    for i in range(1, len(closes)):
+        prev_close = closes[i-1]
+        
+        # Final Upper Band
+        if basic_upperband[i] < final_upperband or prev_close > final_upperband:
+            final_upperband = basic_upperband[i]
+        
+        # Final Lower Band
+        if basic_lowerband[i] > final_lowerband or prev_close < final_lowerband:
+            final_lowerband = basic_lowerband[i]
+        
+        # Determine supertrend direction
+        if direction[-1] == -1:
+            direction.append(-1 if closes[i] <= final_upperband else 1)
+        else:
+            direction.append(1 if closes[i] >= final_lowerband else -1)
+    
+    # Generate signals based on direction change
+    # Check last 2 candles (use -2 to avoid current forming candle)
+    if len(direction) >= 3:
+        # Long signal: direction changes from -1 to 1
+        long_signal = direction[-2] == 1 and direction[-3] == -1
+        # Short signal: direction changes from 1 to -1
+        short_signal = direction[-2] == -1 and direction[-3] == 1
+    else:
+        long_signal = False
+        short_signal = False
+    
+    return {
+        'long_signal': long_signal,
+        'short_signal': short_signal,
+        'supertrend_value': final_upperband if direction[-1] == -1 else final_lowerband,
+        'direction': direction[-1],
+        'current_price': closes[-1]
+    }
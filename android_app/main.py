@@ -10,20 +10,133 @@ from kivy.uix.button import Button
 from kivy.uix.spinner import Spinner
 from kivy.uix.checkbox import CheckBox
 from kivy.uix.popup import Popup
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.clock import Clock
 from kivy.core.window import Window
+from kivy.factory import Factory
 from kivy.properties import StringProperty, BooleanProperty
+import copy
+import hashlib
 import json
 import os
 import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 
-# Import bot components
-import sys
-sys.path.append('..')
-from bybit_client_lite import BybitClientLite
-from supertrend_lite import calculate_supertrend
+# Faster JSON when orjson is available, stdlib otherwise
+try:
+    import orjson
+    
+    _loads = orjson.loads
+    
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode('utf-8')
+
+PAIRS_AVAILABLE = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT", "ZECUSDT", "FARTCOINUSDT")
+
+# Defaults used when no config file exists yet (read-only; copy before use)
+_DEFAULT_CONFIG = MappingProxyType({
+    'api_key': '',
+    'api_secret': '',
+    'testnet': False,
+    'trading_pairs': ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'],
+    'leverage': {
+        'BTCUSDT': 37,
+        'ETHUSDT': 37,
+        'SOLUSDT': 37,
+        'XRPUSDT': 37,
+        'DOGEUSDT': 37,
+        'ZECUSDT': 37,
+        'FARTCOINUSDT': 37
+    },
+    'position_size_percent': 35,
+    'timeframe': '60',
+    'stop_loss_percent': 37,
+    'take_profit_percent': 150,
+    'enable_stop_loss': True,
+    'enable_take_profit': True,
+    'atr_period': 10,
+    'supertrend_factor': 3.0,
+    'check_interval': 60
+})
+
+CONFIG_FILE = 'bot_config.json'
+WALLET_TTL = 5  # seconds a fetched wallet balance is reused across pairs
+
+# Parsed config plus the hash of its on-disk bytes: the file is parsed once
+# and only rewritten when the serialized config actually changes
+_CONFIG_CACHE = None
+_CONFIG_HASH = None
+_CONFIG_PENDING = None
+_CONFIG_LOCK = threading.Lock()
+
+
+def _lower_worker_priority():
+    """Run pool threads at background priority so they never starve the UI"""
+    try:
+        os.nice(10)  # per-thread on Linux/Android
+    except (AttributeError, OSError):
+        pass
+
+
+def _flush_config():
+    """Write the most recently saved config payload to disk"""
+    global _CONFIG_PENDING
+    with _CONFIG_LOCK:
+        payload, _CONFIG_PENDING = _CONFIG_PENDING, None
+        if payload is None:
+            return
+        with open(CONFIG_FILE, 'wb') as f:
+            f.write(payload)
+
+
+class PairRow(RecycleDataViewBehavior, BoxLayout):
+    """Recycled row showing a pair's enable checkbox and leverage input"""
+    pair = StringProperty('')
+    active = BooleanProperty(False)
+    lev = StringProperty('')
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rv = None
+        self.index = None
+        
+        label = Label(size_hint=(0.4, 1))
+        checkbox = CheckBox(size_hint=(0.2, 1))
+        lev_input = TextInput(multiline=False, input_filter='float', size_hint=(0.4, 1))
+        self.add_widget(label)
+        self.add_widget(checkbox)
+        self.add_widget(lev_input)
+        
+        # Data -> widgets
+        self.bind(
+            pair=label.setter('text'),
+            active=checkbox.setter('active'),
+            lev=lev_input.setter('text')
+        )
+        # Widgets -> data (rv.data stays authoritative as views are recycled)
+        checkbox.bind(active=lambda cb, value: self._store('active', value))
+        lev_input.bind(text=lambda ti, value: self._store('lev', value))
+    
+    def refresh_view_attrs(self, rv, index, data):
+        self.rv = rv
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+    
+    def _store(self, key, value):
+        if self.rv is not None and self.index is not None:
+            self.rv.data[self.index][key] = value
+
+
+Factory.register('PairRow', cls=PairRow)
 
 
 class TradingBotApp(App):
@@ -36,8 +149,11 @@ class TradingBotApp(App):
         
         # Load config
         self.config_data = self.load_config()
-        self.bot_thread = None
         self.bot_running = False
+        self.bot_ready = False
+        self.client = None
+        self._executor = None
+        self._tick_ev = None
         
         # Main layout
         main_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
@@ -48,8 +164,14 @@ class TradingBotApp(App):
             size_hint=(1, 0.05),
             color=(0, 1, 0, 1)
         )
+        self.bind(status_text=self.status_label.setter('text'))
         main_layout.add_widget(self.status_label)
         
+        # Worker threads only drop their latest message here; the UI picks it
+        # up at most 10 times a second, however many updates were posted
+        self._pending_status = None
+        Clock.schedule_interval(self._flush_status, 1 / 10)
+        
         # Scrollable settings
         scroll = ScrollView(size_hint=(1, 0.85))
         settings_layout = BoxLayout(orientation='vertical', spacing=10, size_hint_y=None)
@@ -58,11 +180,11 @@ class TradingBotApp(App):
         # API Settings
         settings_layout.add_widget(self.create_section_label("API Settings"))
         
-        self.api_key_input = self.create_text_input("API Key", self.config_data.get('api_key', ''))
-        settings_layout.add_widget(self.api_key_input)
+        layout, self.api_key_input = self.create_text_input("API Key", self.config_data.get('api_key', ''))
+        settings_layout.add_widget(layout)
         
-        self.api_secret_input = self.create_text_input("API Secret", self.config_data.get('api_secret', ''), password=True)
-        settings_layout.add_widget(self.api_secret_input)
+        layout, self.api_secret_input = self.create_text_input("API Secret", self.config_data.get('api_secret', ''), password=True)
+        settings_layout.add_widget(layout)
         
         # Testnet/Mainnet
         testnet_layout = BoxLayout(size_hint_y=None, height=40)
@@ -71,52 +193,50 @@ class TradingBotApp(App):
         testnet_layout.add_widget(self.testnet_checkbox)
         settings_layout.add_widget(testnet_layout)
         
-        # Trading Pairs
-        settings_layout.add_widget(self.create_section_label("Trading Pairs"))
+        # Trading Pairs & Leverage (recycled rows, only visible ones are instantiated)
+        settings_layout.add_widget(self.create_section_label("Trading Pairs & Leverage"))
         
-        pairs_available = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT", "ZECUSDT", "FARTCOINUSDT"]
-        self.pair_checkboxes = {}
-        
-        for pair in pairs_available:
-            pair_layout = BoxLayout(size_hint_y=None, height=40)
-            pair_layout.add_widget(Label(text=pair, size_hint=(0.7, 1)))
-            checkbox = CheckBox(
-                active=(pair in self.config_data.get('trading_pairs', [])),
-                size_hint=(0.3, 1)
-            )
-            self.pair_checkboxes[pair] = checkbox
-            pair_layout.add_widget(checkbox)
-            settings_layout.add_widget(pair_layout)
+        self.pairs_rv = RecycleView(viewclass='PairRow', size_hint_y=None, height=200)
+        pairs_layout = RecycleBoxLayout(
+            default_size=(None, 40),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            orientation='vertical'
+        )
+        pairs_layout.bind(minimum_height=pairs_layout.setter('height'))
+        self.pairs_rv.add_widget(pairs_layout)
+        active_set = frozenset(self.config_data.get('trading_pairs', ()))
+        leverage = self.config_data.get('leverage', {})
+        self.pairs_rv.data = [
+            {
+                'pair': pair,
+                'active': pair in active_set,
+                'lev': str(leverage.get(pair, 25))
+            }
+            for pair in PAIRS_AVAILABLE
+        ]
+        settings_layout.add_widget(self.pairs_rv)
         
         # Risk Management
         settings_layout.add_widget(self.create_section_label("Risk Management"))
         
-        self.position_size_input = self.create_number_input(
+        layout, self.position_size_input = self.create_number_input(
             "Position Size %",
             str(self.config_data.get('position_size_percent', 35))
         )
-        settings_layout.add_widget(self.position_size_input)
+        settings_layout.add_widget(layout)
         
-        self.stop_loss_input = self.create_number_input(
+        layout, self.stop_loss_input = self.create_number_input(
             "Stop Loss %",
             str(self.config_data.get('stop_loss_percent', 42))
         )
-        settings_layout.add_widget(self.stop_loss_input)
+        settings_layout.add_widget(layout)
         
-        self.take_profit_input = self.create_number_input(
+        layout, self.take_profit_input = self.create_number_input(
             "Take Profit %",
             str(self.config_data.get('take_profit_percent', 150))
         )
-        settings_layout.add_widget(self.take_profit_input)
-        
-        # Leverage Settings
-        settings_layout.add_widget(self.create_section_label("Leverage Settings"))
-        
-        self.leverage_inputs = {}
-        for pair in pairs_available:
-            lev = self.config_data.get('leverage', {}).get(pair, 25)
-            self.leverage_inputs[pair] = self.create_number_input(f"{pair} Leverage", str(lev))
-            settings_layout.add_widget(self.leverage_inputs[pair])
+        settings_layout.add_widget(layout)
         
         # Timeframe
         settings_layout.add_widget(self.create_section_label("Strategy Settings"))
@@ -174,6 +294,7 @@ class TradingBotApp(App):
         return label
     
     def create_text_input(self, hint, text, password=False):
+        """Build a labelled text row; returns (layout, text_input)"""
         layout = BoxLayout(size_hint_y=None, height=40)
         layout.add_widget(Label(text=hint + ":", size_hint=(0.4, 1)))
         text_input = TextInput(
@@ -183,9 +304,10 @@ class TradingBotApp(App):
             size_hint=(0.6, 1)
         )
         layout.add_widget(text_input)
-        return layout
+        return layout, text_input
     
     def create_number_input(self, hint, text):
+        """Build a labelled numeric row; returns (layout, text_input)"""
         layout = BoxLayout(size_hint_y=None, height=40)
         layout.add_widget(Label(text=hint + ":", size_hint=(0.5, 1)))
         text_input = TextInput(
@@ -195,64 +317,44 @@ class TradingBotApp(App):
             size_hint=(0.5, 1)
         )
         layout.add_widget(text_input)
-        return layout
+        return layout, text_input
     
     def load_config(self):
-        config_file = 'bot_config.json'
-        if os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                return json.load(f)
-        
-        return {
-            'api_key': '',
-            'api_secret': '',
-            'testnet': False,
-            'trading_pairs': ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'],
-            'leverage': {
-                'BTCUSDT': 37,
-                'ETHUSDT': 37,
-                'SOLUSDT': 37,
-                'XRPUSDT': 37,
-                'DOGEUSDT': 37,
-                'ZECUSDT': 37,
-                'FARTCOINUSDT': 37
-            },
-            'position_size_percent': 35,
-            'timeframe': '60',
-            'stop_loss_percent': 37,
-            'take_profit_percent': 150,
-            'enable_stop_loss': True,
-            'enable_take_profit': True,
-            'atr_period': 10,
-            'supertrend_factor': 3.0,
-            'check_interval': 60
-        }
+        global _CONFIG_CACHE, _CONFIG_HASH
+        if _CONFIG_CACHE is not None:
+            return _CONFIG_CACHE
+        
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'rb') as f:
+                raw = f.read()
+            _CONFIG_CACHE = _loads(raw)
+            _CONFIG_HASH = hashlib.sha256(raw).hexdigest()
+            return _CONFIG_CACHE
+        
+        return copy.deepcopy(dict(_DEFAULT_CONFIG))
     
     def save_config(self, instance):
-        # Get selected pairs
-        selected_pairs = [pair for pair, checkbox in self.pair_checkboxes.items() if checkbox.active]
+        # Get selected pairs and leverage from the RecycleView data
+        rows = self.pairs_rv.data
+        selected_pairs = [row['pair'] for row in rows if row['active']]
         
         if not selected_pairs:
             self.show_popup("Error", "Please select at least one trading pair!")
             return
         
-        # Get leverage for each pair
-        leverage = {}
-        for pair, input_layout in self.leverage_inputs.items():
-            text_input = input_layout.children[0]
-            leverage[pair] = int(float(text_input.text or 25))
+        leverage = {row['pair']: int(float(row['lev'] or 25)) for row in rows}
         
         # Build config
         config = {
-            'api_key': self.api_key_input.children[0].text,
-            'api_secret': self.api_secret_input.children[0].text,
+            'api_key': self.api_key_input.text,
+            'api_secret': self.api_secret_input.text,
             'testnet': self.testnet_checkbox.active,
             'trading_pairs': selected_pairs,
             'leverage': leverage,
-            'position_size_percent': float(self.position_size_input.children[0].text or 35),
+            'position_size_percent': float(self.position_size_input.text or 35),
             'timeframe': self.timeframe_spinner.text,
-            'stop_loss_percent': float(self.stop_loss_input.children[0].text or 42),
-            'take_profit_percent': float(self.take_profit_input.children[0].text or 150),
+            'stop_loss_percent': float(self.stop_loss_input.text or 42),
+            'take_profit_percent': float(self.take_profit_input.text or 150),
             'enable_stop_loss': True,
             'enable_take_profit': True,
             'atr_period': 10,
@@ -266,12 +368,27 @@ class TradingBotApp(App):
             return
         
         # Save to file
-        with open('bot_config.json', 'w') as f:
-            json.dump(config, f, indent=4)
+        self.write_config(config)
         
         self.config_data = config
+        # SL/TP targets may have changed; a running bot refills the factors on its next order
+        self._trade_factors = {}
         self.show_popup("Success", "Configuration saved!")
     
+    def write_config(self, config):
+        """Cache config and write it to disk in the background if it changed"""
+        global _CONFIG_CACHE, _CONFIG_HASH, _CONFIG_PENDING
+        payload = _dumps(config)
+        digest = hashlib.sha256(payload).hexdigest()
+        
+        _CONFIG_CACHE = config
+        if digest == _CONFIG_HASH:
+            return
+        
+        _CONFIG_HASH = digest
+        _CONFIG_PENDING = payload
+        threading.Thread(target=_flush_config, daemon=True).start()
+    
     def show_popup(self, title, message):
         popup = Popup(
             title=title,
@@ -286,129 +403,242 @@ class TradingBotApp(App):
             return
         
         self.bot_running = True
+        self.bot_ready = False
         self.is_running = True
         self.start_button.disabled = True
         self.stop_button.disabled = False
         self.status_text = "Bot Running..."
         
-        # Start bot in thread
-        self.bot_thread = threading.Thread(target=self.run_bot)
-        self.bot_thread.daemon = True
-        self.bot_thread.start()
+        # Bot components are imported on first start to keep app launch light
+        from bybitbot.bybit_client_lite import BybitClientLite
+        
+        pairs = self.config_data['trading_pairs']
+        self.client = BybitClientLite(
+            api_key=self.config_data['api_key'],
+            api_secret=self.config_data['api_secret'],
+            testnet=self.config_data['testnet']
+        )
+        self.last_signals = {pair: 'none' for pair in pairs}
+        self._applied_leverage = {}
+        self._trade_factors = {}
+        for symbol in pairs:
+            self._refresh_trade_factors(symbol, self.config_data['leverage'].get(symbol, 37))
+        self._wallet_lock = threading.Lock()
+        self._wallet_usdt = 0.0
+        self._wallet_ts = float('-inf')
+        self._tick_futures = []
+        self._setup_jobs = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(2, min(len(pairs), os.cpu_count() or 2)),
+            thread_name_prefix='bybit-bot',
+            initializer=_lower_worker_priority
+        )
+        
+        # Signal checks are driven by the Kivy clock; the account setup calls
+        # run in parallel on the pool and kick off the first tick when done
+        self._tick_ev = Clock.schedule_interval(self._tick, self.config_data.get('check_interval', 60))
+        self._setup_bot()
     
     def stop_bot(self, instance):
         self.bot_running = False
         self.is_running = False
         self.start_button.disabled = False
         self.stop_button.disabled = True
+        self._pending_status = None
         self.status_text = "Bot Stopped"
+        
+        if self._tick_ev is not None:
+            self._tick_ev.cancel()
+            self._tick_ev = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def _setup_bot(self):
+        """Set position mode and leverage concurrently before the first signal check"""
+        client = self.client
+        jobs = {self._executor.submit(client.set_position_mode, 0): None}
+        for symbol in self.config_data['trading_pairs']:
+            lev = self.config_data['leverage'].get(symbol, 25)
+            jobs[self._executor.submit(client.set_leverage, symbol, lev)] = (symbol, lev)
+        
+        self._setup_jobs = jobs
+        self._setup_done = 0
+        for future in jobs:
+            # Completion callbacks run on worker threads; hop to the UI thread
+            future.add_done_callback(
+                lambda f: Clock.schedule_once(lambda dt: self._on_setup_done(f))
+            )
+    
+    def _on_setup_done(self, future):
+        """Track setup progress and start ticking once every call has finished"""
+        if not self.bot_running or future not in self._setup_jobs:
+            return
+        
+        if future.exception() is not None:
+            self.show_popup("Error", str(future.exception()))
+            self.stop_bot(None)
+            return
+        
+        item = self._setup_jobs[future]
+        if item is not None and future.result():
+            symbol, lev = item
+            self._applied_leverage[symbol] = lev
+        
+        self._setup_done += 1
+        total = len(self._setup_jobs)
+        self.status_text = f"Setting up... ({self._setup_done}/{total})"
+        
+        if self._setup_done == total:
+            self.bot_ready = True
+            self.status_text = "Bot Running..."
+            self._tick(0)
+    
+    def _flush_status(self, dt):
+        """Apply the most recent status posted by a worker thread"""
+        if self._pending_status is not None:
+            self.status_text = self._pending_status
+            self._pending_status = None
+    
+    def _tick(self, dt):
+        """Dispatch one signal check per trading pair to the worker pool"""
+        if not self.bot_running or not self.bot_ready:
+            return
+        
+        # Skip this round if the previous one is still in flight
+        if any(not future.done() for future in self._tick_futures):
+            return
+        
+        self._pending_status = f"Checking signals... {time.strftime('%H:%M:%S')}"
+        self._tick_futures = [
+            self._executor.submit(self._check_symbol, symbol)
+            for symbol in self.config_data['trading_pairs']
+        ]
+    
+    def _refresh_trade_factors(self, symbol, lev):
+        """Cache the entry-price multipliers for ROI-based SL/TP at this leverage"""
+        sl_move = (self.config_data['stop_loss_percent'] / lev) / 100
+        tp_move = (self.config_data['take_profit_percent'] / lev) / 100
+        # (long SL, long TP, short SL, short TP)
+        factors = (1 - sl_move, 1 + tp_move, 1 + sl_move, 1 - tp_move)
+        self._trade_factors[symbol] = factors
+        return factors
+    
+    def _get_wallet_usdt(self):
+        """USDT wallet balance, fetched at most once per WALLET_TTL for all pairs"""
+        with self._wallet_lock:
+            now = time.monotonic()
+            if now - self._wallet_ts > WALLET_TTL:
+                balance = self.client.get_wallet_balance()
+                wallet = 0.0
+                for coin in balance.get('list', [{}])[0].get('coin', []):
+                    if coin.get('coin') == 'USDT':
+                        wallet = float(coin.get('walletBalance', 0))
+                self._wallet_usdt = wallet
+                self._wallet_ts = now
+            return self._wallet_usdt
     
-    def run_bot(self):
+    def _wait_until_flat(self, symbol, timeout=1.0):
+        """Poll the position until it is closed, for at most timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if float(self.client.get_position(symbol).get('size') or 0) == 0:
+                return True
+            time.sleep(0.1)
+        return False
+    
+    def _check_symbol(self, symbol):
+        """Check a single pair for a new signal and trade on it"""
+        if not self.bot_running:
+            return
+        
+        import numpy as np
+        from bybitbot.supertrend_lite import calculate_supertrend
+        
+        # Bind settings to locals once instead of re-resolving them per use
+        cfg = self.config_data
+        timeframe = cfg['timeframe']
+        atr_period = cfg.get('atr_period', 10)
+        factor = cfg.get('supertrend_factor', 3.0)
+        position_pct = cfg['position_size_percent']
+        lev = cfg['leverage'].get(symbol, 37)
+        
         try:
-            client = BybitClientLite(
-                api_key=self.config_data['api_key'],
-                api_secret=self.config_data['api_secret'],
-                testnet=self.config_data['testnet']
+            client = self.client
+            
+            # Get candles as one contiguous float32 OHLC array
+            candles = client.get_klines(symbol, timeframe, limit=200)
+            
+            if not candles:
+                return
+            
+            ohlc = np.array([candle[1:5] for candle in candles], dtype=np.float32)
+            
+            # Calculate Supertrend signals
+            result = calculate_supertrend(
+                ohlc,
+                atr_period=atr_period,
+                factor=factor
             )
             
-            # Set position mode
-            client.set_position_mode(0)
+            # Determine signal
+            if result['long_signal']:
+                signal = 'long'
+            elif result['short_signal']:
+                signal = 'short'
+            else:
+                signal = 'none'
             
-            # Set leverage
-            for symbol in self.config_data['trading_pairs']:
-                lev = self.config_data['leverage'].get(symbol, 25)
-                client.set_leverage(symbol, lev)
+            # Execute trade if signal changed
+            if signal == 'none' or signal == self.last_signals[symbol] or not self.bot_running:
+                return
             
-            last_signals = {pair: 'none' for pair in self.config_data['trading_pairs']}
+            self.last_signals[symbol] = signal
             
-            while self.bot_running:
-                try:
-                    Clock.schedule_once(lambda dt: setattr(self, 'status_text', f"Checking signals... {datetime.now().strftime('%H:%M:%S')}"))
-                    
-                    for symbol in self.config_data['trading_pairs']:
-                        # Get candles
-                        candles = client.get_klines(symbol, self.config_data['timeframe'], limit=200)
-                        
-                        if not candles:
-                            continue
-                        
-                        # Calculate Supertrend signals
-                        result = calculate_supertrend(
-                            candles,
-                            atr_period=self.config_data.get('atr_period', 10),
-                            factor=self.config_data.get('supertrend_factor', 3.0)
-                        )
-                        
-                        # Determine signal
-                        if result['long_signal']:
-                            signal = 'long'
-                        elif result['short_signal']:
-                            signal = 'short'
-                        else:
-                            signal = 'none'
-                        
-                        # Execute trade if signal changed
-                        if signal != 'none' and signal != last_signals[symbol]:
-                            last_signals[symbol] = signal
-                            
-                            # Get wallet and calculate position size
-                            balance = client.get_wallet_balance()
-                            wallet = 0.0
-                            for coin in balance.get('list', [{}])[0].get('coin', []):
-                                if coin.get('coin') == 'USDT':
-                                    wallet = float(coin.get('walletBalance', 0))
-                            
-                            usd = wallet * (self.config_data['position_size_percent'] / 100)
-                            lev = self.config_data['leverage'].get(symbol, 37)
-                            
-                            # Set leverage
-                            client.set_leverage(symbol, lev)
-                            
-                            qty = client.calculate_qty(symbol, usd, lev)
-                            
-                            if qty > 0:
-                                # Close opposite position
-                                pos = client.get_position(symbol)
-                                if pos:
-                                    client.close_position(symbol)
-                                    time.sleep(1)
-                                
-                                # Get entry price for SL/TP
-                                ticker = client.get_ticker(symbol)
-                                entry_price = float(ticker.get('lastPrice', 0))
-                                
-                                stop_loss = None
-                                take_profit = None
-                                
-                                if signal == 'long':
-                                    # For LONG: SL below, TP above (ROI-based)
-                                    stop_loss = entry_price * (1 - (self.config_data['stop_loss_percent'] / lev) / 100)
-                                    take_profit = entry_price * (1 + (self.config_data['take_profit_percent'] / lev) / 100)
-                                    side = 'Buy'
-                                    emoji = '🟢'
-                                else:
-                                    # For SHORT: SL above, TP below (ROI-based)
-                                    stop_loss = entry_price * (1 + (self.config_data['stop_loss_percent'] / lev) / 100)
-                                    take_profit = entry_price * (1 - (self.config_data['take_profit_percent'] / lev) / 100)
-                                    side = 'Sell'
-                                    emoji = '🔴'
-                                
-                                # Place order
-                                client.place_order(symbol, side, qty, stop_loss=stop_loss, take_profit=take_profit)
-                                
-                                Clock.schedule_once(
-                                    lambda dt: setattr(self, 'status_text', f"{emoji} {side} {symbol} ${usd:.2f}")
-                                )
-                    
-                    time.sleep(self.config_data.get('check_interval', 60))
-                    
-                except Exception as e:
-                    Clock.schedule_once(lambda dt: setattr(self, 'status_text', f"Error: {str(e)}"))
-                    time.sleep(5)
+            # Get wallet and calculate position size
+            wallet = self._get_wallet_usdt()
+            usd = wallet * (position_pct / 100)
+            
+            # Set leverage only if it differs from what was last applied
+            if self._applied_leverage.get(symbol) != lev and client.set_leverage(symbol, lev):
+                self._applied_leverage[symbol] = lev
+                self._refresh_trade_factors(symbol, lev)
+            
+            qty = client.calculate_qty(symbol, usd, lev)
+            
+            if qty > 0:
+                # Close any open position and wait only until it is flat
+                response = client.close_position(symbol)
+                if response.get('retCode') == 0 and response.get('retMsg') != 'No position':
+                    self._wait_until_flat(symbol)
+                
+                # Get entry price for SL/TP
+                ticker = client.get_ticker(symbol)
+                entry_price = float(ticker.get('lastPrice', 0))
+                
+                factors = self._trade_factors.get(symbol) or self._refresh_trade_factors(symbol, lev)
+                sl_long, tp_long, sl_short, tp_short = factors
+                
+                if signal == 'long':
+                    # For LONG: SL below, TP above (ROI-based)
+                    stop_loss = entry_price * sl_long
+                    take_profit = entry_price * tp_long
+                    side = 'Buy'
+                    emoji = '🟢'
+                else:
+                    # For SHORT: SL above, TP below (ROI-based)
+                    stop_loss = entry_price * sl_short
+                    take_profit = entry_price * tp_short
+                    side = 'Sell'
+                    emoji = '🔴'
+                
+                # Place order
+                client.place_order(symbol, side, qty, stop_loss=stop_loss, take_profit=take_profit)
+                
+                self._pending_status = f"{emoji} {side} {symbol} ${usd:.2f}"
         
         except Exception as e:
-            Clock.schedule_once(lambda dt: self.show_popup("Error", str(e)))
-            self.stop_bot(None)
+            self._pending_status = f"Error: {str(e)}"
 
 
 if __name__ == '__main__':
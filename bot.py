@@ -3,10 +3,19 @@ Twin Range Filter Trading Bot
 Automated trading on Bybit derivatives
 """
 
+import asyncio
+import atexit
 import time
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 try:
     from config import (
@@ -49,23 +58,60 @@ except ImportError:
     CHECK_INTERVAL = 60
 
 from bybit_client import BybitClient
-from twin_range_filter import calculate_twin_range_filter, get_latest_signal
+from bybit_ws import BybitWSFeed, BybitWSTrade
+from twin_range_filter import TwinRangeFilterState
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+# Records go through a queue so file/console writes happen on the listener
+# thread, not on the trading threads (force=True replaces the handler that
+# bybit_client's import-time basicConfig installs)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler('trading_bot.log'), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler], force=True)
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
+def _safe_float(value, default: float = 0.0) -> float:
+    """Convert an API field to float, falling back to default for empty or bad values"""
+    try:
+        return float(value) if value else default
+    except (ValueError, TypeError):
+        return default
+
+
+@dataclass(slots=True, frozen=True)
+class PositionView:
+    """Parsed position for one symbol"""
+    side: str
+    size: float
+    entry_price: float = 0.0
+    unrealized_pnl: float = 0.0
+    leverage: float = 1.0
+
+
+FLAT_POSITION = PositionView(side='None', size=0.0)
+
+
 class TwinRangeFilterBot:
     """Trading bot using Twin Range Filter strategy"""
     
+    KLINE_SEED_SIZE = 200  # Candles replayed to warm up the incremental filter
+    KLINE_UPDATE_SIZE = 3  # Candles fetched per poll: two closed plus the forming one
+    WALLET_TTL = 5.0  # Seconds a fetched wallet balance is reused for sizing
+    TICKER_TTL = 5.0  # Seconds a batched ticker snapshot is trusted
+    POSITION_SYNC_INTERVAL = 30  # Seconds between batched position syncs while streaming
+    LATENCY_WARN_MS = 30  # Above this the bot is probably not hosted near Bybit
+    EXIT_CHECK_THROTTLE = 1.0  # Min seconds between exit checks per symbol on ticker pushes
+    
     def __init__(self):
         """Initialize the trading bot"""
         self.client = BybitClient(
@@ -77,6 +123,42 @@ class TwinRangeFilterBot:
         self.last_signals: Dict[str, str] = {pair: 'none' for pair in TRADING_PAIRS}
         self.running = False
         self.wallet_balance = 0.0
+        self._wallet_ts = 0.0
+        self._tickers: Dict[str, float] = dict.fromkeys(TRADING_PAIRS, 0.0)
+        self._tickers_ts = 0.0
+        
+        # Blocking REST calls for all symbols run concurrently on this pool;
+        # order placement is serialized so the one-position rule still holds
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(TRADING_PAIRS)))
+        self._trade_lock = threading.Lock()
+        
+        # Prices and closed candles are pushed over WebSocket; REST is only the fallback
+        self.feed = BybitWSFeed(
+            TRADING_PAIRS,
+            testnet=USE_TESTNET,
+            interval=TIMEFRAME,
+            on_ticker=self._on_ticker,
+            on_kline=self._on_kline
+        )
+        self._trf_states: Dict[str, TwinRangeFilterState] = {}
+        self._last_bar_start: Dict[str, int] = {}
+        self._kline_interval_ms = int(TIMEFRAME) * 60_000 if str(TIMEFRAME).isdigit() else None
+        self._last_exit_check: Dict[str, float] = {}
+        self._exit_pending = set()
+        
+        # Orders go over the authenticated trade WebSocket while it is up
+        self.client.ws_trade = BybitWSTrade(BYBIT_API_KEY, BYBIT_API_SECRET, testnet=USE_TESTNET)
+        
+        # symbol -> (fetched_at, position); dropped whenever we trade the symbol
+        self._pos_cache: Dict[str, Tuple[float, PositionView]] = {}
+        # Symbols that may hold a position; exit checks skip everything else
+        self._open_symbols = set()
+        
+        # symbol -> leverage last confirmed by the exchange, so orders skip set_leverage
+        self._applied_leverage: Dict[str, int] = {}
+        
+        # symbol -> SL/TP price multipliers for the leverage last applied
+        self._price_mults: Dict[str, Dict[str, float]] = {}
         
         logger.info(f"Bot initialized - {'TESTNET' if USE_TESTNET else 'MAINNET'}")
         logger.info(f"Trading pairs: {', '.join(TRADING_PAIRS)}")
@@ -87,23 +169,62 @@ class TwinRangeFilterBot:
             logger.info(f"Take Profit enabled at {TAKE_PROFIT_PERCENT}% ROI gain")
     
     def setup_leverage(self):
-        """Set up leverage for all trading pairs"""
-        for symbol in self.trading_pairs:
-            leverage = LEVERAGE.get(symbol, 10)
-            if self.client.set_leverage(symbol, leverage):
+        """Set up leverage for all trading pairs (requests are sent concurrently)"""
+        leverages = {symbol: LEVERAGE.get(symbol, 10) for symbol in self.trading_pairs}
+        results = self._executor.map(
+            lambda symbol: self.client.set_leverage(symbol, leverages[symbol]),
+            self.trading_pairs
+        )
+        
+        for symbol, ok in zip(self.trading_pairs, list(results)):
+            leverage = leverages[symbol]
+            if ok:
                 logger.info(f"Leverage set to {leverage}x for {symbol}")
+                self._applied_leverage[symbol] = leverage
+                self._update_price_mults(symbol, leverage)
             else:
                 logger.warning(f"Could not set leverage for {symbol}")
     
+    def _update_price_mults(self, symbol: str, leverage: int) -> Dict[str, float]:
+        """Cache the entry-price multipliers that put SL/TP at their ROI targets for this leverage"""
+        # ROI Formula: roi = ((current_price - entry_price) / entry_price) * leverage * 100
+        # So for price calculation from ROI:
+        # price_move = entry_price * (ROI_PERCENT / leverage / 100)
+        sl_move = STOP_LOSS_PERCENT / leverage / 100
+        tp_move = TAKE_PROFIT_PERCENT / leverage / 100
+        mults = {
+            'leverage': leverage,
+            # Price move in percent that each target represents, for logging
+            'sl_move_pct': STOP_LOSS_PERCENT / leverage,
+            'tp_move_pct': TAKE_PROFIT_PERCENT / leverage,
+            'sl_long': 1 - sl_move,
+            'tp_long': 1 + tp_move,
+            'sl_short': 1 + sl_move,
+            'tp_short': 1 - tp_move
+        }
+        self._price_mults[symbol] = mults
+        return mults
+    
+    def _get_price_mults(self, symbol: str, leverage: int) -> Dict[str, float]:
+        """Cached SL/TP multipliers, recomputed only if the leverage changed"""
+        mults = self._price_mults.get(symbol)
+        if mults is None or mults['leverage'] != leverage:
+            mults = self._update_price_mults(symbol, leverage)
+        return mults
+    
     def update_wallet_balance(self):
-        """Update current wallet balance"""
+        """Update current wallet balance, reusing a fetch younger than WALLET_TTL"""
+        if time.monotonic() - self._wallet_ts < self.WALLET_TTL:
+            return self.wallet_balance
+        
         balance = self.client.get_wallet_balance()
         if balance:
             coins = balance.get('list', [{}])[0].get('coin', [])
             for coin in coins:
                 if coin.get('coin') == 'USDT':
                     self.wallet_balance = float(coin.get('walletBalance', 0))
-                    logger.debug(f"Wallet balance updated: {self.wallet_balance:.2f} USDT")
+                    self._wallet_ts = time.monotonic()
+                    logger.debug("Wallet balance updated: %.2f USDT", self.wallet_balance)
                     return self.wallet_balance
         return 0.0
     
@@ -116,44 +237,134 @@ class TwinRangeFilterBot:
             # Calculate USD amount as percentage of wallet
             usd_amount = self.wallet_balance * (POSITION_SIZE_PERCENT / 100)
             
-            logger.info(f"Position size for {symbol}: ${usd_amount:.2f} ({POSITION_SIZE_PERCENT}% of ${self.wallet_balance:.2f})")
+            logger.info("Position size for %s: $%.2f (%s%% of $%.2f)", symbol, usd_amount, POSITION_SIZE_PERCENT, self.wallet_balance)
         else:
             # Fallback to fixed amount if dynamic sizing disabled
             usd_amount = 35
         
         return usd_amount
     
-    def get_current_position(self, symbol: str) -> Dict:
-        """Get current position info for a symbol"""
-        position = self.client.get_position(symbol)
+    def get_current_price(self, symbol: str) -> float:
+        """Latest price from the WebSocket feed, falling back to a REST ticker"""
+        price = self.feed.get_price(symbol)
+        if price is not None:
+            return price
         
+        if self._tickers.get(symbol) and time.monotonic() - self._tickers_ts < self.TICKER_TTL:
+            return self._tickers[symbol]
+        
+        ticker = self.client.get_ticker(symbol)
+        return float(ticker.get('lastPrice', 0)) if ticker else 0.0
+    
+    def get_current_position(self, symbol: str, max_age: float = 5.0) -> PositionView:
+        """Get current position info for a symbol, reusing a fetch younger than max_age seconds"""
+        cached = self._pos_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        
+        position = self._fetch_position(symbol)
+        self._store_position(symbol, position)
+        return position
+    
+    def _store_position(self, symbol: str, position: PositionView):
+        """Cache a fetched position and track whether the symbol is open"""
+        self._pos_cache[symbol] = (time.monotonic(), position)
+        if position.size > 0:
+            self._open_symbols.add(symbol)
+        else:
+            self._open_symbols.discard(symbol)
+    
+    def invalidate_position(self, symbol: str):
+        """Forget the cached position so the next read hits the exchange"""
+        self._pos_cache.pop(symbol, None)
+        # We just traded it, so it may be open until a fetch says otherwise
+        self._open_symbols.add(symbol)
+    
+    def _refresh_market_snapshot(self):
+        """Refresh all positions, plus open pairs' prices while the feed is down"""
+        self._refresh_positions()
+        if not self.feed.connected:
+            self._refresh_prices(list(self._open_symbols))
+    
+    def _refresh_positions(self):
+        """Fetch all positions in one request and cache them per symbol"""
+        positions = self.client.get_all_positions()
+        if positions is not None:
+            # Pairs missing from the list are flat
+            by_symbol = {p.get('symbol'): p for p in positions}
+            for symbol in self.trading_pairs:
+                self._store_position(symbol, self._parse_position(by_symbol.get(symbol)))
+    
+    def _refresh_prices(self, symbols: List[str]):
+        """Fetch the given pairs' tickers concurrently and cache their prices"""
+        if not symbols:
+            return
+        
+        tickers = self._executor.map(self.client.get_ticker, symbols)
+        for symbol, ticker in zip(symbols, tickers):
+            if ticker:
+                self._tickers[symbol] = _safe_float(ticker.get('lastPrice'))
+        self._tickers_ts = time.monotonic()
+    
+    def _fetch_position(self, symbol: str) -> PositionView:
+        """Fetch current position info for a symbol from the exchange"""
+        return self._parse_position(self.client.get_position(symbol))
+    
+    @staticmethod
+    def _parse_position(position: Dict) -> PositionView:
+        """Convert a raw position record into a PositionView"""
         if not position:
-            return {'side': 'None', 'size': 0}
-        
-        # Helper function to safely convert to float
-        def safe_float(value, default=0.0):
-            try:
-                return float(value) if value and value != '' else default
-            except (ValueError, TypeError):
-                return default
-        
-        return {
-            'side': position.get('side', 'None'),
-            'size': safe_float(position.get('size', 0)),
-            'entry_price': safe_float(position.get('avgPrice', 0)),
-            'unrealized_pnl': safe_float(position.get('unrealisedPnl', 0)),
-            'leverage': position.get('leverage', 0)
-        }
+            return FLAT_POSITION
+        
+        fields = (position.get('size'), position.get('avgPrice'), position.get('unrealisedPnl'))
+        try:
+            # Happy path: all fields are numeric strings (empty -> 0)
+            size, entry_price, unrealized_pnl = [float(value or 0) for value in fields]
+        except (ValueError, TypeError):
+            size, entry_price, unrealized_pnl = [_safe_float(value) for value in fields]
+        
+        return PositionView(
+            side=position.get('side', 'None'),
+            size=size,
+            entry_price=entry_price,
+            unrealized_pnl=unrealized_pnl,
+            # Missing leverage counts as 1x, as the ROI checks always assumed
+            leverage=_safe_float(position.get('leverage'), 1.0)
+        )
+    
+    def _ensure_leverage(self, symbol: str, leverage: int) -> bool:
+        """Set leverage only if it differs from what was last applied"""
+        if self._applied_leverage.get(symbol) == leverage:
+            return True
+        
+        if not self.client.set_leverage(symbol, leverage):
+            return False
+        self._applied_leverage[symbol] = leverage
+        return True
+    
+    def _wait_until_flat(self, symbol: str, timeout: float = 2.0, interval: float = 0.1) -> bool:
+        """Poll the position until it is closed instead of sleeping a fixed time"""
+        deadline = time.monotonic() + timeout
+        while True:
+            position = self._fetch_position(symbol)
+            if position.size == 0:
+                self._store_position(symbol, position)
+                return True
+            if time.monotonic() >= deadline:
+                logger.warning("Position on %s still open after %.1fs", symbol, timeout)
+                return False
+            time.sleep(interval)
     
     def close_position(self, symbol: str) -> bool:
         """Close position for a symbol"""
         position = self.get_current_position(symbol)
         
-        if position['size'] == 0:
+        if position.size == 0:
             return True
         
-        logger.info(f"Closing {position['side']} position for {symbol}")
+        logger.info("Closing %s position for %s", position.side, symbol)
         response = self.client.close_position(symbol)
+        self.invalidate_position(symbol)
         
         return response.get('retCode') == 0
     
@@ -161,72 +372,59 @@ class TwinRangeFilterBot:
         """Open a long position with proper SL/TP"""
         # Check if ANY other position is open
         if self.has_any_position():
-            logger.info(f"❌ Cannot open LONG on {symbol} - another position is already active")
+            logger.info("❌ Cannot open LONG on %s - another position is already active", symbol)
             return False
         
         # First, close any existing short position on this symbol
         position = self.get_current_position(symbol)
         
-        if position['side'] == 'Sell' and position['size'] > 0:
-            logger.info(f"Closing short position before opening long on {symbol}")
+        if position.side == 'Sell' and position.size > 0:
+            logger.info("Closing short position before opening long on %s", symbol)
             if not self.close_position(symbol):
-                logger.error(f"Failed to close short position on {symbol}")
+                logger.error("Failed to close short position on %s", symbol)
                 return False
-            time.sleep(2)  # Wait for position to close
+            self._wait_until_flat(symbol)
         
         # Calculate quantity
         usd_amount = self.calculate_position_size(symbol)
         leverage = LEVERAGE.get(symbol, 37)
         
-        # Set leverage
-        if not self.client.set_leverage(symbol, leverage):
-            logger.error(f"Failed to set leverage for {symbol}")
+        # Set leverage (no request unless it changed)
+        if not self._ensure_leverage(symbol, leverage):
+            logger.error("Failed to set leverage for %s", symbol)
             return False
         
         qty = self.client.calculate_qty(symbol, usd_amount, leverage)
         
         if qty == 0:
-            logger.error(f"Could not calculate quantity for {symbol}")
+            logger.error("Could not calculate quantity for %s", symbol)
             return False
         
         # Get current price for SL/TP calculation
-        ticker = self.client.get_ticker(symbol)
-        if not ticker:
-            logger.error(f"Failed to get ticker for {symbol}")
-            return False
-        
-        entry_price = float(ticker.get('lastPrice', 0))
+        entry_price = self.get_current_price(symbol)
         if entry_price == 0:
-            logger.error(f"Invalid price for {symbol}")
+            logger.error("Invalid price for %s", symbol)
             return False
         
         # Calculate stop loss and take profit prices for LONG
-        # ROI Formula: roi = ((current_price - entry_price) / entry_price) * leverage * 100
-        # So for price calculation from ROI:
-        # price_move = entry_price * (ROI_PERCENT / leverage / 100)
+        mults = self._get_price_mults(symbol, leverage)
         stop_loss_price = None
         take_profit_price = None
         
         if ENABLE_STOP_LOSS:
             # For LONG: stop loss is BELOW entry (price goes down = loss)
-            # At SL trigger: roi = -STOP_LOSS_PERCENT
-            price_move = entry_price * (STOP_LOSS_PERCENT / leverage / 100)
-            stop_loss_price = entry_price - price_move
+            stop_loss_price = entry_price * mults['sl_long']
         
         if ENABLE_TAKE_PROFIT:
             # For LONG: take profit is ABOVE entry (price goes up = profit)
-            # At TP trigger: roi = TAKE_PROFIT_PERCENT
-            price_move = entry_price * (TAKE_PROFIT_PERCENT / leverage / 100)
-            take_profit_price = entry_price + price_move
+            take_profit_price = entry_price * mults['tp_long']
         
         # Place long order
-        logger.info(f"Opening LONG position on {symbol} - Qty: {qty:.4f} @ ${entry_price:.4f} | {leverage}x")
+        logger.info("Opening LONG position on %s - Qty: %.4f @ $%.4f | %sx", symbol, qty, entry_price, leverage)
         if stop_loss_price:
-            price_move_percent = ((entry_price - stop_loss_price) / entry_price) * 100
-            logger.info(f"   ⛔ SL: ${stop_loss_price:.4f} ({price_move_percent:.2f}% price move = {STOP_LOSS_PERCENT}% ROI loss)")
+            logger.info("   ⛔ SL: $%.4f (%.2f%% price move = %s%% ROI loss)", stop_loss_price, mults['sl_move_pct'], STOP_LOSS_PERCENT)
         if take_profit_price:
-            price_move_percent = ((take_profit_price - entry_price) / entry_price) * 100
-            logger.info(f"   🎯 TP: ${take_profit_price:.4f} ({price_move_percent:.2f}% price move = {TAKE_PROFIT_PERCENT}% ROI gain)")
+            logger.info("   🎯 TP: $%.4f (%.2f%% price move = %s%% ROI gain)", take_profit_price, mults['tp_move_pct'], TAKE_PROFIT_PERCENT)
         
         response = self.client.place_order(
             symbol=symbol,
@@ -235,6 +433,7 @@ class TwinRangeFilterBot:
             stop_loss=stop_loss_price,
             take_profit=take_profit_price
         )
+        self.invalidate_position(symbol)
         
         return response.get('retCode') == 0
     
@@ -242,72 +441,59 @@ class TwinRangeFilterBot:
         """Open a short position with proper SL/TP"""
         # Check if ANY other position is open
         if self.has_any_position():
-            logger.info(f"❌ Cannot open SHORT on {symbol} - another position is already active")
+            logger.info("❌ Cannot open SHORT on %s - another position is already active", symbol)
             return False
         
         # First, close any existing long position on this symbol
         position = self.get_current_position(symbol)
         
-        if position['side'] == 'Buy' and position['size'] > 0:
-            logger.info(f"Closing long position before opening short on {symbol}")
+        if position.side == 'Buy' and position.size > 0:
+            logger.info("Closing long position before opening short on %s", symbol)
             if not self.close_position(symbol):
-                logger.error(f"Failed to close long position on {symbol}")
+                logger.error("Failed to close long position on %s", symbol)
                 return False
-            time.sleep(2)  # Wait for position to close
+            self._wait_until_flat(symbol)
         
         # Calculate quantity
         usd_amount = self.calculate_position_size(symbol)
         leverage = LEVERAGE.get(symbol, 37)
         
-        # Set leverage
-        if not self.client.set_leverage(symbol, leverage):
-            logger.error(f"Failed to set leverage for {symbol}")
+        # Set leverage (no request unless it changed)
+        if not self._ensure_leverage(symbol, leverage):
+            logger.error("Failed to set leverage for %s", symbol)
             return False
         
         qty = self.client.calculate_qty(symbol, usd_amount, leverage)
         
         if qty == 0:
-            logger.error(f"Could not calculate quantity for {symbol}")
+            logger.error("Could not calculate quantity for %s", symbol)
             return False
         
         # Get current price for SL/TP calculation
-        ticker = self.client.get_ticker(symbol)
-        if not ticker:
-            logger.error(f"Failed to get ticker for {symbol}")
-            return False
-        
-        entry_price = float(ticker.get('lastPrice', 0))
+        entry_price = self.get_current_price(symbol)
         if entry_price == 0:
-            logger.error(f"Invalid price for {symbol}")
+            logger.error("Invalid price for %s", symbol)
             return False
         
         # Calculate stop loss and take profit prices for SHORT
-        # ROI Formula: roi = ((entry_price - current_price) / entry_price) * leverage * 100
-        # So for price calculation from ROI:
-        # price_move = entry_price * (ROI_PERCENT / leverage / 100)
+        mults = self._get_price_mults(symbol, leverage)
         stop_loss_price = None
         take_profit_price = None
         
         if ENABLE_STOP_LOSS:
             # For SHORT: stop loss is ABOVE entry (price goes up = loss)
-            # At SL trigger: roi = -STOP_LOSS_PERCENT
-            price_move = entry_price * (STOP_LOSS_PERCENT / leverage / 100)
-            stop_loss_price = entry_price + price_move
+            stop_loss_price = entry_price * mults['sl_short']
         
         if ENABLE_TAKE_PROFIT:
             # For SHORT: take profit is BELOW entry (price goes down = profit)
-            # At TP trigger: roi = TAKE_PROFIT_PERCENT
-            price_move = entry_price * (TAKE_PROFIT_PERCENT / leverage / 100)
-            take_profit_price = entry_price - price_move
+            take_profit_price = entry_price * mults['tp_short']
         
         # Place short order
-        logger.info(f"Opening SHORT position on {symbol} - Qty: {qty:.4f} @ ${entry_price:.4f} | {leverage}x")
+        logger.info("Opening SHORT position on %s - Qty: %.4f @ $%.4f | %sx", symbol, qty, entry_price, leverage)
         if stop_loss_price:
-            price_move_percent = ((stop_loss_price - entry_price) / entry_price) * 100
-            logger.info(f"   ⛔ SL: ${stop_loss_price:.4f} ({price_move_percent:.2f}% price move = {STOP_LOSS_PERCENT}% ROI loss)")
+            logger.info("   ⛔ SL: $%.4f (%.2f%% price move = %s%% ROI loss)", stop_loss_price, mults['sl_move_pct'], STOP_LOSS_PERCENT)
         if take_profit_price:
-            price_move_percent = ((entry_price - take_profit_price) / entry_price) * 100
-            logger.info(f"   🎯 TP: ${take_profit_price:.4f} ({price_move_percent:.2f}% price move = {TAKE_PROFIT_PERCENT}% ROI gain)")
+            logger.info("   🎯 TP: $%.4f (%.2f%% price move = %s%% ROI gain)", take_profit_price, mults['tp_move_pct'], TAKE_PROFIT_PERCENT)
         
         response = self.client.place_order(
             symbol=symbol,
@@ -316,197 +502,300 @@ class TwinRangeFilterBot:
             stop_loss=stop_loss_price,
             take_profit=take_profit_price
         )
+        self.invalidate_position(symbol)
         
         return response.get('retCode') == 0
     
     def has_any_position(self) -> bool:
         """Check if ANY position is open across all pairs"""
+        now = time.monotonic()
+        if any(symbol not in self._pos_cache or now - self._pos_cache[symbol][0] >= 5.0 for symbol in self.trading_pairs):
+            self._refresh_positions()
+        
         for symbol in self.trading_pairs:
             position = self.get_current_position(symbol)
-            if position['size'] > 0:
+            if position.size > 0:
                 return True
         return False
     
+    async def _gather_symbols(self, func, symbols: List[str] = None):
+        """Run a blocking per-symbol check for every trading pair (or the given subset) concurrently"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, func, symbol) for symbol in (symbols or self.trading_pairs)),
+            return_exceptions=True
+        )
+    
+    def _position_rois(self) -> Tuple[List[str], np.ndarray]:
+        """ROI % of every open position, computed in one vectorized pass over the snapshot"""
+        positions = [(symbol, self.get_current_position(symbol)) for symbol in list(self._open_symbols)]
+        positions = [(symbol, p) for symbol, p in positions if p.size > 0]
+        if not positions:
+            return [], np.empty(0)
+        
+        symbols = [symbol for symbol, _ in positions]
+        entry = np.array([p.entry_price for _, p in positions], dtype=float)
+        price = np.array([self.get_current_price(symbol) for symbol in symbols], dtype=float)
+        lev = np.array([p.leverage for _, p in positions])
+        sign = np.where(np.array([p.side for _, p in positions]) == 'Buy', 1.0, -1.0)
+        
+        # Formula: roi = ((price_change / entry_price) * leverage * 100); invalid rows become NaN and never trigger
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = sign * (price - entry) / entry * lev * 100
+        roi[(entry == 0) | (price == 0) | (lev == 0)] = np.nan
+        
+        return symbols, roi
+    
     def process_signal(self, symbol: str, signal: str):
         """Process a trading signal - Close opposite position first, then open new position"""
         if signal == 'none':
             return
         
+        with self._trade_lock:
+            self._process_signal(symbol, signal)
+    
+    def _process_signal(self, symbol: str, signal: str):
+        """Body of process_signal, called with the trade lock held"""
         current_position = self.get_current_position(symbol)
         
         if signal == 'long':
-            logger.info(f"🟢 LONG SIGNAL on {symbol}")
+            logger.info("🟢 LONG SIGNAL on %s", symbol)
             
             # If already in LONG on this symbol, skip
-            if current_position['side'] == 'Buy' and current_position['size'] > 0:
-                logger.info(f"Already in LONG position on {symbol}, skipping")
+            if current_position.side == 'Buy' and current_position.size > 0:
+                logger.info("Already in LONG position on %s, skipping", symbol)
                 return
             
             # If in SHORT on this symbol, close it first
-            if current_position['side'] == 'Sell' and current_position['size'] > 0:
-                logger.info(f"Closing SHORT position on {symbol} before opening LONG")
+            if current_position.side == 'Sell' and current_position.size > 0:
+                logger.info("Closing SHORT position on %s before opening LONG", symbol)
                 if not self.close_position(symbol):
-                    logger.error(f"Failed to close SHORT on {symbol}")
+                    logger.error("Failed to close SHORT on %s", symbol)
                     return
-                time.sleep(2)
+                self._wait_until_flat(symbol)
             
             # Try to open LONG
             if self.open_long(symbol):
-                logger.info(f"✅ Successfully opened LONG on {symbol}")
+                logger.info("✅ Successfully opened LONG on %s", symbol)
             else:
-                logger.error(f"❌ Failed to open LONG on {symbol}")
+                logger.error("❌ Failed to open LONG on %s", symbol)
         
         elif signal == 'short':
-            logger.info(f"🔴 SHORT SIGNAL on {symbol}")
+            logger.info("🔴 SHORT SIGNAL on %s", symbol)
             
             # If already in SHORT on this symbol, skip
-            if current_position['side'] == 'Sell' and current_position['size'] > 0:
-                logger.info(f"Already in SHORT position on {symbol}, skipping")
+            if current_position.side == 'Sell' and current_position.size > 0:
+                logger.info("Already in SHORT position on %s, skipping", symbol)
                 return
             
             # If in LONG on this symbol, close it first
-            if current_position['side'] == 'Buy' and current_position['size'] > 0:
-                logger.info(f"Closing LONG position on {symbol} before opening SHORT")
+            if current_position.side == 'Buy' and current_position.size > 0:
+                logger.info("Closing LONG position on %s before opening SHORT", symbol)
                 if not self.close_position(symbol):
-                    logger.error(f"Failed to close LONG on {symbol}")
+                    logger.error("Failed to close LONG on %s", symbol)
                     return
-                time.sleep(2)
+                self._wait_until_flat(symbol)
             
             # Try to open SHORT
             if self.open_short(symbol):
-                logger.info(f"✅ Successfully opened SHORT on {symbol}")
+                logger.info("✅ Successfully opened SHORT on %s", symbol)
             else:
-                logger.error(f"❌ Failed to open SHORT on {symbol}")
+                logger.error("❌ Failed to open SHORT on %s", symbol)
     
-    def check_stop_loss(self):
-        """Check all positions for stop loss triggers"""
-        if not ENABLE_STOP_LOSS:
+    async def check_exits(self):
+        """Check all positions for stop loss and take profit triggers in one pass"""
+        if not (ENABLE_STOP_LOSS or ENABLE_TAKE_PROFIT):
             return
         
-        for symbol in self.trading_pairs:
-            try:
-                position = self.get_current_position(symbol)
-                
-                if position['size'] == 0:
-                    continue
-                
-                # Get current price
-                ticker = self.client.get_ticker(symbol)
-                if not ticker:
-                    continue
-                
-                current_price = float(ticker.get('lastPrice', 0))
-                entry_price = position['entry_price']
-                side = position['side']
-                leverage = float(position['leverage']) if position['leverage'] else 1
-                
-                if entry_price == 0 or current_price == 0 or leverage == 0:
-                    continue
-                
-                # Calculate ROI percentage
-                # Formula: roi = ((price_change / entry_price) * leverage * 100)
-                if side == 'Buy':  # Long position
-                    roi = ((current_price - entry_price) / entry_price) * leverage * 100
-                else:  # Short position
-                    roi = ((entry_price - current_price) / entry_price) * leverage * 100
-                
-                # Check if stop loss triggered (ROI <= -STOP_LOSS_PERCENT)
-                if roi <= -STOP_LOSS_PERCENT:
-                    logger.warning(
-                        f"🛑 STOP LOSS TRIGGERED on {symbol} - "
-                        f"ROI: {roi:.2f}% (Entry: ${entry_price:.4f}, Current: ${current_price:.4f}, Leverage: {leverage:.0f}x, Size: {position['size']:.4f})"
-                    )
-                    if self.close_position(symbol):
-                        logger.info(f"✅ Stop loss executed successfully on {symbol}")
-                    else:
-                        logger.error(f"❌ Failed to execute stop loss on {symbol}")
-                
-            except Exception as e:
-                logger.error(f"Error checking stop loss for {symbol}: {e}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._refresh_market_snapshot)
+        symbols, roi = await loop.run_in_executor(self._executor, self._position_rois)
+        
+        # Both thresholds in one vectorized comparison; disabled ones mask to False
+        hit = ((roi <= -STOP_LOSS_PERCENT) & ENABLE_STOP_LOSS) | ((roi >= TAKE_PROFIT_PERCENT) & ENABLE_TAKE_PROFIT)
+        triggered = [symbols[i] for i in np.flatnonzero(hit)]
+        if triggered:
+            await self._gather_symbols(self._check_exit_symbol, triggered)
+    
+    def _check_exit_symbol(self, symbol: str):
+        """Check a single symbol's position for a stop loss or take profit trigger"""
+        try:
+            position = self.get_current_position(symbol)
+            
+            if position.size == 0:
+                return
+            
+            # Get current price
+            current_price = self.get_current_price(symbol)
+            entry_price = position.entry_price
+            side = position.side
+            leverage = position.leverage
+            
+            if entry_price == 0 or current_price == 0 or leverage == 0:
+                return
+            
+            # Calculate ROI percentage
+            # Formula: roi = ((price_change / entry_price) * leverage * 100)
+            if side == 'Buy':  # Long position
+                roi = ((current_price - entry_price) / entry_price) * leverage * 100
+            else:  # Short position
+                roi = ((entry_price - current_price) / entry_price) * leverage * 100
+            
+            if ENABLE_STOP_LOSS and roi <= -STOP_LOSS_PERCENT:
+                trigger, label = "🛑 STOP LOSS", "Stop loss"
+            elif ENABLE_TAKE_PROFIT and roi >= TAKE_PROFIT_PERCENT:
+                trigger, label = "🎯 TAKE PROFIT", "Take profit"
+            else:
+                return
+            
+            logger.warning(
+                "%s TRIGGERED on %s - "
+                "ROI: %.2f%% (Entry: $%.4f, Current: $%.4f, Leverage: %.0fx, Size: %.4f)",
+                trigger, symbol, roi, entry_price, current_price, leverage, position.size
+            )
+            with self._trade_lock:
+                closed = self.close_position(symbol)
+            if closed:
+                logger.info("✅ %s executed successfully on %s", label, symbol)
+            else:
+                logger.error("❌ Failed to execute %s on %s", label.lower(), symbol)
+            
+        except Exception as e:
+            logger.error("Error checking exits for %s: %s", symbol, e)
+    
+    async def check_signals(self):
+        """Check for trading signals on all pairs"""
+        await self._gather_symbols(self._check_signal_symbol)
+    
+    def _check_signal_symbol(self, symbol: str):
+        """Check a single symbol for a new trading signal"""
+        try:
+            # Only the newest candles are fetched; older ones are already in the filter state
+            df = self.client.get_klines(symbol, TIMEFRAME, limit=self.KLINE_UPDATE_SIZE)
+            
+            if df.empty:
+                logger.warning("No data received for %s", symbol)
+                return
+            
+            # The last candle is still forming
+            closed = df.iloc[:-1]
+            starts = [int(ts.timestamp() * 1000) for ts in closed['timestamp']]
+            last_start = self._last_bar_start.get(symbol)
+            new_bars = [i for i, start in enumerate(starts) if last_start is None or start > last_start]
+            
+            if not new_bars:
+                return  # No candle closed since the last check
+            
+            if len(new_bars) == len(starts):
+                # Every fetched candle is new, so some may be missing - rebuild from history
+                self._seed_signal_state(symbol)
+                signal = self._trf_states[symbol].signal
+            else:
+                state = self._trf_states[symbol]
+                for i in new_bars:
+                    signal = state.update(float(closed['close'].iloc[i]))
+                self._last_bar_start[symbol] = starts[-1]
+            
+            self._act_on_signal(symbol, signal, df['close'].iloc[-1])
+            
+        except Exception as e:
+            logger.error("Error processing %s: %s", symbol, e)
+    
+    def _act_on_signal(self, symbol: str, signal: str, current_price: float):
+        """Trade on a signal that differs from the last one seen for the symbol"""
+        # Only process if it's a new signal
+        if signal != 'none' and signal != self.last_signals[symbol]:
+            self.last_signals[symbol] = signal
+            self.process_signal(symbol, signal)
+        elif signal == 'none':
+            self.last_signals[symbol] = 'none'
+        
+        # Log current state (skips the position lookup unless DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            position = self.get_current_position(symbol)
+            logger.debug("%s: Price=%.2f, Position=%s (%s)", symbol, current_price, position.side, position.size)
     
-    def check_take_profit(self):
-        """Check all positions for take profit triggers"""
-        if not ENABLE_TAKE_PROFIT:
+    def _seed_signal_state(self, symbol: str):
+        """Build the incremental filter state for a symbol from REST history"""
+        df = self.client.get_klines(symbol, TIMEFRAME, limit=self.KLINE_SEED_SIZE)
+        if df.empty or len(df) < 2:
+            logger.warning("No data received for %s", symbol)
             return
         
-        for symbol in self.trading_pairs:
-            try:
-                position = self.get_current_position(symbol)
-                
-                if position['size'] == 0:
-                    continue
-                
-                # Get current price
-                ticker = self.client.get_ticker(symbol)
-                if not ticker:
-                    continue
-                
-                current_price = float(ticker.get('lastPrice', 0))
-                entry_price = position['entry_price']
-                side = position['side']
-                leverage = float(position['leverage']) if position['leverage'] else 1
-                
-                if entry_price == 0 or current_price == 0 or leverage == 0:
-                    continue
-                
-                # Calculate ROI percentage
-                # Formula: roi = ((price_change / entry_price) * leverage * 100)
-                if side == 'Buy':  # Long position
-                    roi = ((current_price - entry_price) / entry_price) * leverage * 100
-                else:  # Short position
-                    roi = ((entry_price - current_price) / entry_price) * leverage * 100
-                
-                # Check if take profit triggered (ROI >= TAKE_PROFIT_PERCENT)
-                if roi >= TAKE_PROFIT_PERCENT:
-                    logger.warning(
-                        f"🎯 TAKE PROFIT TRIGGERED on {symbol} - "
-                        f"ROI: {roi:.2f}% (Entry: ${entry_price:.4f}, Current: ${current_price:.4f}, Leverage: {leverage:.0f}x, Size: {position['size']:.4f})"
-                    )
-                    if self.close_position(symbol):
-                        logger.info(f"✅ Take profit executed successfully on {symbol}")
-                    else:
-                        logger.error(f"❌ Failed to execute take profit on {symbol}")
-                
-            except Exception as e:
-                logger.error(f"Error checking take profit for {symbol}: {e}")
+        # The last REST candle is still forming; the stream delivers it once closed
+        closed = df.iloc[:-1]
+        self._trf_states[symbol] = TwinRangeFilterState.from_closes(
+            closed['close'],
+            fast_period=TWIN_RANGE_FAST_PERIOD,
+            fast_range=TWIN_RANGE_FAST_RANGE,
+            slow_period=TWIN_RANGE_SLOW_PERIOD,
+            slow_range=TWIN_RANGE_SLOW_RANGE
+        )
+        self._last_bar_start[symbol] = int(closed['timestamp'].iloc[-1].timestamp() * 1000)
     
-    def check_signals(self):
-        """Check for trading signals on all pairs"""
-        for symbol in self.trading_pairs:
-            try:
-                # Fetch kline data
-                df = self.client.get_klines(symbol, TIMEFRAME, limit=200)
-                
-                if df.empty:
-                    logger.warning(f"No data received for {symbol}")
-                    continue
-                
-                # Calculate Twin Range Filter
-                df = calculate_twin_range_filter(
-                    df,
-                    fast_period=TWIN_RANGE_FAST_PERIOD,
-                    fast_range=TWIN_RANGE_FAST_RANGE,
-                    slow_period=TWIN_RANGE_SLOW_PERIOD,
-                    slow_range=TWIN_RANGE_SLOW_RANGE
-                )
-                
-                # Get latest signal
-                signal = get_latest_signal(df)
-                
-                # Only process if it's a new signal
-                if signal != 'none' and signal != self.last_signals[symbol]:
-                    self.last_signals[symbol] = signal
-                    self.process_signal(symbol, signal)
-                elif signal == 'none':
-                    self.last_signals[symbol] = 'none'
-                
-                # Log current state
-                position = self.get_current_position(symbol)
-                current_price = df['close'].iloc[-1]
-                logger.debug(f"{symbol}: Price={current_price:.2f}, Position={position['side']} ({position['size']})")
-                
-            except Exception as e:
-                logger.error(f"Error processing {symbol}: {e}")
+    def _reseed_through(self, symbol: str, start: int, close: float, retry_delay: float = 1.0):
+        """Rebuild the filter state from REST so it includes the pushed candle at start; its signal or None"""
+        for attempt in range(2):
+            if attempt:
+                time.sleep(retry_delay)
+            self._seed_signal_state(symbol)
+            last_start = self._last_bar_start.get(symbol, -1)
+            
+            if last_start >= start:
+                return self._trf_states[symbol].signal
+            if self._kline_interval_ms is not None and start - last_start == self._kline_interval_ms:
+                # REST doesn't list the just-closed candle as closed yet - apply the pushed one
+                self._last_bar_start[symbol] = start
+                return self._trf_states[symbol].update(close)
+        return None
+    
+    def _on_kline(self, symbol: str, candle: Dict):
+        """WebSocket kline push - evaluate signals as soon as a candle closes"""
+        if not candle.get('confirm'):
+            return
+        
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(self._executor, self._on_closed_candle, symbol, candle)
+    
+    def _on_closed_candle(self, symbol: str, candle: Dict):
+        """Advance the symbol's filter state by one closed candle and act on its signal"""
+        try:
+            start = int(candle['start'])
+            close = float(candle['close'])
+            last_start = self._last_bar_start.get(symbol)
+            
+            if last_start is not None and start <= last_start:
+                return  # Duplicate push
+            
+            if last_start is None or self._kline_interval_ms is None or start - last_start != self._kline_interval_ms:
+                # No state yet or a gap after reconnecting - rebuild it from REST
+                signal = self._reseed_through(symbol, start, close)
+                if signal is None:
+                    logger.warning("Could not rebuild %s up to the candle at %s", symbol, start)
+                    return
+            else:
+                signal = self._trf_states[symbol].update(close)
+                self._last_bar_start[symbol] = start
+            
+            self._act_on_signal(symbol, signal, close)
+            
+        except Exception as e:
+            logger.error("Error processing %s: %s", symbol, e)
+    
+    def _on_ticker(self, symbol: str, price: float):
+        """WebSocket ticker push - check SL/TP, throttled per symbol"""
+        if symbol not in self._open_symbols:
+            return  # Flat - nothing to exit, no request needed
+        
+        now = time.monotonic()
+        if symbol in self._exit_pending or now - self._last_exit_check.get(symbol, 0) < self.EXIT_CHECK_THROTTLE:
+            return
+        
+        self._exit_pending.add(symbol)
+        self._last_exit_check[symbol] = now
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._check_exit_symbol, symbol)
+        future.add_done_callback(lambda _: self._exit_pending.discard(symbol))
     
     def print_status(self):
         """Print current status of all positions"""
@@ -514,20 +803,22 @@ class TwinRangeFilterBot:
         logger.info("CURRENT POSITIONS")
         logger.info("=" * 50)
         
+        self._refresh_market_snapshot()
+        
         for symbol in self.trading_pairs:
             position = self.get_current_position(symbol)
-            ticker = self.client.get_ticker(symbol)
-            current_price = float(ticker.get('lastPrice', 0)) if ticker else 0
+            current_price = self.get_current_price(symbol)
             
-            if position['size'] > 0:
-                pnl = position['unrealized_pnl']
+            if position.size > 0:
+                pnl = position.unrealized_pnl
                 pnl_sign = '+' if pnl >= 0 else ''
                 logger.info(
-                    f"{symbol}: {position['side']} {position['size']} @ {position['entry_price']:.2f} "
-                    f"| Current: {current_price:.2f} | PnL: {pnl_sign}{pnl:.2f} USDT"
+                    "%s: %s %s @ %.2f | Current: %.2f | PnL: %s%.2f USDT",
+                    symbol, position.side, position.size, position.entry_price,
+                    current_price, pnl_sign, pnl
                 )
             else:
-                logger.info(f"{symbol}: No position | Price: {current_price:.2f}")
+                logger.info("%s: No position | Price: %.2f", symbol, current_price)
         
         logger.info("=" * 50)
     
@@ -544,29 +835,12 @@ class TwinRangeFilterBot:
         # Print initial status
         self.print_status()
         
-        logger.info(f"Starting main loop - checking every {CHECK_INTERVAL} seconds")
+        logger.info(f"Starting main loop - signals on candle close, REST polling every {CHECK_INTERVAL}s if the stream drops")
         logger.info("Press Ctrl+C to stop")
         
-        last_status_time = time.time()
-        
         try:
-            while self.running:
-                # Check for stop losses first
-                self.check_stop_loss()
-                
-                # Check for take profits
-                self.check_take_profit()
-                
-                # Then check for new signals
-                self.check_signals()
-                
-                # Print status every 5 minutes
-                if time.time() - last_status_time > 300:
-                    self.print_status()
-                    last_status_time = time.time()
-                
-                time.sleep(CHECK_INTERVAL)
-                
+            asyncio.run(self._run_async())
+        
         except KeyboardInterrupt:
             logger.info("\nBot stopped by user")
             self.running = False
@@ -575,15 +849,60 @@ class TwinRangeFilterBot:
             self.running = False
         
         self.print_status()
+        self._executor.shutdown(wait=False)
+        self.client.close()
         logger.info("Bot shutdown complete")
     
+    async def _run_async(self):
+        """Main loop body; driven by the WebSocket feed, with REST polling while it is down"""
+        loop = asyncio.get_running_loop()
+        for symbol in self.trading_pairs:
+            await loop.run_in_executor(self._executor, self._seed_signal_state, symbol)
+        
+        feed_task = asyncio.create_task(self.feed.run())
+        trade_task = asyncio.create_task(self.client.ws_trade.run())
+        try:
+            await self._main_loop()
+        finally:
+            await self.feed.stop()
+            await self.client.ws_trade.stop()
+            feed_task.cancel()
+            trade_task.cancel()
+    
+    async def _main_loop(self):
+        last_status_time = time.time()
+        last_sync_time = time.time()
+        
+        while self.running:
+            if self.feed.connected:
+                # Pick up positions opened or closed outside the bot (e.g. exchange-side SL/TP)
+                if time.time() - last_sync_time > self.POSITION_SYNC_INTERVAL:
+                    await asyncio.get_running_loop().run_in_executor(self._executor, self._refresh_market_snapshot)
+                    last_sync_time = time.time()
+            else:
+                # Stream down - fall back to polling
+                # Check stop losses and take profits first
+                await self.check_exits()
+                
+                # Then check for new signals
+                await self.check_signals()
+            
+            # Print status every 5 minutes
+            if time.time() - last_status_time > 300:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.print_status)
+                last_status_time = time.time()
+            
+            # Signals and exits are event-driven while the stream is up;
+            # this only paces the fallback polling and status output
+            await asyncio.sleep(1 if self.feed.connected else CHECK_INTERVAL)
+    
     def test_connection(self):
         """Test connection and API credentials"""
         logger.info("Testing Bybit connection...")
         
-        # Test market data
-        for symbol in self.trading_pairs:
-            ticker = self.client.get_ticker(symbol)
+        # Test market data (all tickers fetched concurrently)
+        tickers = list(self._executor.map(self.client.get_ticker, self.trading_pairs))
+        for symbol, ticker in zip(self.trading_pairs, tickers):
             if ticker:
                 price = ticker.get('lastPrice', 'N/A')
                 logger.info(f"{symbol}: {price}")
@@ -591,6 +910,16 @@ class TwinRangeFilterBot:
                 logger.error(f"Failed to get ticker for {symbol}")
                 return False
         
+        # Every order pays this round-trip, so flag slow hosting early
+        latency = self.client.measure_latency()
+        if latency > self.LATENCY_WARN_MS:
+            logger.warning(
+                f"⚠️ API round-trip is {latency:.0f} ms (> {self.LATENCY_WARN_MS} ms) - "
+                f"consider hosting the bot in AWS ap-southeast-1 (Singapore), close to Bybit's servers"
+            )
+        elif latency >= 0:
+            logger.info(f"API round-trip: {latency:.1f} ms")
+        
         # Test account access
         balance = self.client.get_wallet_balance()
         if balance:
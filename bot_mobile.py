@@ -3,33 +3,85 @@ Mobile Trading Bot - Runs directly on Android via Termux
 Simplified version optimized for mobile devices
 """
 
+import asyncio
+import atexit
 import time
 import logging
 import json
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Tuple
 import os
-import signal
 import sys
 
+import numpy as np
+
+# Faster config/state (de)serialization when orjson is available
+try:
+    import orjson
+    
+    _loads = orjson.loads
+    
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=4).encode('utf-8')
+
 from bybit_client import BybitClient
-from twin_range_filter import calculate_twin_range_filter, get_latest_signal
+from bybit_ws import BybitWSFeed
+from twin_range_filter import TwinRangeFilterState
 
 # Configure logging for mobile
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot_mobile.log'),
-        logging.StreamHandler()
-    ]
-)
+# Records go through a queue so file/console writes happen on the listener
+# thread, not in the check loop; the log file rotates to bound its size on the
+# phone (force=True replaces the handler that bybit_client's import-time
+# basicConfig installs)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    RotatingFileHandler('bot_mobile.log', maxBytes=2_000_000, backupCount=3),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler], force=True)
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
+# Numeric position fields, in the order _parse_position unpacks them
+_POSITION_FLOAT_KEYS = ('size', 'avgPrice', 'unrealisedPnl', 'leverage')
+
+
+def _safe_float(value, default: float = 0.0) -> float:
+    """Convert an API field to float, falling back to default for empty or bad values"""
+    try:
+        return float(value) if value else default
+    except (ValueError, TypeError):
+        return default
+
+
 class MobileTradingBot:
     """Mobile-optimized trading bot"""
     
+    KLINE_SEED_SIZE = 200  # Candles replayed to build a symbol's filter state
+    KLINE_UPDATE_SIZE = 3  # Candles fetched per check: two closed plus the forming one
+    STATE_FILE = 'bot_state.json'
+    STATE_FLUSH_INTERVAL = 5  # Seconds between coalesced state writes
+    WAKE_ROI_FRACTION = 0.5  # Wake the stop-loss check early once a position is this far toward its stop loss
+    MIN_CYCLE_GAP = 5  # Seconds between stop-loss checks, however often the loop is woken
+    SNAPSHOT_MAX_AGE = 5  # Seconds before print_status refetches instead of reusing the check snapshot
+    
     def __init__(self, config_file='mobile_config.json'):
         """Initialize from config file"""
         self.config = self.load_config(config_file)
@@ -41,9 +93,61 @@ class MobileTradingBot:
         )
         
         self.trading_pairs = self.config['trading_pairs']
+        
+        # Settings read on every check, hoisted out of the config dict once
+        self.timeframe = str(self.config['timeframe'])
+        self.check_interval = float(self.config['check_interval'])
+        # Pairs missing from the leverage config use 35x
+        self.leverage: Dict[str, int] = {
+            symbol: int(self.config['leverage'].get(symbol, 35)) for symbol in self.trading_pairs
+        }
+        # symbol -> leverage last confirmed by the exchange, so orders skip set_leverage
+        self._applied_leverage: Dict[str, int] = {}
+        self.position_size_pct = float(self.config['position_size_percent'])
+        self.enable_sl = bool(self.config.get('enable_stop_loss', True))
+        self.sl_pct = float(self.config.get('stop_loss_percent', 37))
+        self.enable_tp = bool(self.config.get('enable_take_profit', True))
+        self.tp_pct = float(self.config.get('take_profit_percent', 150))
+        self.trf_params = {
+            'fast_period': int(self.config.get('twin_range_fast_period', 27)),
+            'fast_range': float(self.config.get('twin_range_fast_range', 1.6)),
+            'slow_period': int(self.config.get('twin_range_slow_period', 55)),
+            'slow_range': float(self.config.get('twin_range_slow_range', 2.0))
+        }
         self.last_signals: Dict[str, str] = {pair: 'none' for pair in self.trading_pairs}
         self.running = False
         self.wallet_balance = 0.0
+        self._balance_cache = (0.0, 0.0)  # (fetched_at, balance); fetched_at 0 = stale
+        self._balance_ttl = 30
+        
+        # Per-symbol REST calls run concurrently on this pool
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.trading_pairs)))
+        
+        # Prices are pushed over WebSocket; stop losses are checked on every push
+        self.feed = BybitWSFeed(
+            self.trading_pairs,
+            testnet=self.config['testnet'],
+            on_ticker=self._on_ticker
+        )
+        # Positions from the last check cycle, read by the ticker callback
+        self._positions: Dict[str, Dict] = {}
+        # Symbols that may hold a position (all until the first fetch); empty = nothing to check
+        self._open_symbols = set(self.trading_pairs)
+        self._sl_pending = set()
+        # Set by ticker pushes to run the next check cycle early
+        self._wake = asyncio.Event()
+        self._last_cycle = 0.0
+        # (fetched_at, positions, prices) from the last stop-loss check, reused by print_status
+        self._snapshot = None
+        
+        # Incremental filter state per symbol, advanced one closed candle at a time
+        self._trf_states: Dict[str, TwinRangeFilterState] = {}
+        self._last_bar_start: Dict[str, int] = {}
+        
+        # State writes are coalesced: signals mark it dirty, the main loop flushes
+        self._state_dirty = False
+        self._last_state_hash = None
+        self._last_state_flush = 0.0
         
         logger.info("📱 Mobile Bot initialized")
         logger.info(f"Mode: {'TESTNET' if self.config['testnet'] else 'MAINNET'}")
@@ -58,8 +162,8 @@ class MobileTradingBot:
             logger.info(f"Please edit {config_file} with your API keys and settings")
             sys.exit(1)
         
-        with open(config_file, 'r') as f:
-            return json.load(f)
+        with open(config_file, 'rb') as f:
+            return _loads(f.read())
     
     def create_default_config(self, config_file):
         """Create default config file"""
@@ -86,24 +190,52 @@ class MobileTradingBot:
             "check_interval": 60
         }
         
-        with open(config_file, 'w') as f:
-            json.dump(default_config, f, indent=4)
+        with open(config_file, 'wb') as f:
+            f.write(_dumps(default_config))
     
     def save_state(self):
-        """Save current state to file"""
+        """Save current state to file atomically (temp file + fsync + rename)"""
         state = {
             'last_signals': self.last_signals,
             'last_update': datetime.now().isoformat()
         }
-        with open('bot_state.json', 'w') as f:
-            json.dump(state, f, indent=4)
+        tmp_file = self.STATE_FILE + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(_dumps(state))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.STATE_FILE)
+        
+        self._state_dirty = False
+        self._last_state_hash = hash(tuple(sorted(self.last_signals.items())))
+        self._last_state_flush = time.monotonic()
+    
+    def mark_state_dirty(self):
+        """Schedule a state write for the next flush_state()"""
+        self._state_dirty = True
+    
+    def flush_state(self, force: bool = False):
+        """Write state if it changed, at most once per STATE_FLUSH_INTERVAL unless forced"""
+        if not self._state_dirty:
+            return
+        if not force and time.monotonic() - self._last_state_flush < self.STATE_FLUSH_INTERVAL:
+            return
+        
+        if hash(tuple(sorted(self.last_signals.items()))) == self._last_state_hash:
+            self._state_dirty = False
+            return
+        
+        try:
+            self.save_state()
+        except OSError as e:
+            logger.error("Failed to save state: %s", e)
     
     def load_state(self):
         """Load previous state from file"""
-        if os.path.exists('bot_state.json'):
+        if os.path.exists(self.STATE_FILE):
             try:
-                with open('bot_state.json', 'r') as f:
-                    state = json.load(f)
+                with open(self.STATE_FILE, 'rb') as f:
+                    state = _loads(f.read())
                     self.last_signals = state.get('last_signals', self.last_signals)
                     logger.info("Previous state restored")
             except:
@@ -112,58 +244,95 @@ class MobileTradingBot:
     def setup_leverage(self):
         """Set up leverage for all pairs"""
         for symbol in self.trading_pairs:
-            leverage = self.config['leverage'].get(symbol, 10)
-            if self.client.set_leverage(symbol, leverage):
-                logger.info(f"✓ {symbol}: {leverage}x")
+            if self._ensure_leverage(symbol):
+                logger.info(f"✓ {symbol}: {self.leverage[symbol]}x")
     
     def update_wallet_balance(self):
-        """Update wallet balance"""
+        """Update wallet balance, reusing a fetch younger than the cache TTL"""
+        fetched_at, cached = self._balance_cache
+        if fetched_at and time.monotonic() - fetched_at < self._balance_ttl:
+            return cached
+        
         balance = self.client.get_wallet_balance()
         if balance:
             coins = balance.get('list', [{}])[0].get('coin', [])
             for coin in coins:
                 if coin.get('coin') == 'USDT':
                     self.wallet_balance = float(coin.get('walletBalance', 0))
+                    self._balance_cache = (time.monotonic(), self.wallet_balance)
                     return self.wallet_balance
         return 0.0
     
+    def invalidate_wallet_balance(self):
+        """Force the next balance read to hit the exchange (after a fill)"""
+        self._balance_cache = (0.0, 0.0)
+    
     def calculate_position_size(self, symbol: str) -> float:
         """Calculate position size from wallet percentage"""
         self.update_wallet_balance()
-        usd_amount = self.wallet_balance * (self.config['position_size_percent'] / 100)
+        usd_amount = self.wallet_balance * (self.position_size_pct / 100)
         return usd_amount
     
     def get_position(self, symbol: str) -> Dict:
         """Get current position"""
-        position = self.client.get_position(symbol)
-        
+        return self._parse_position(self.client.get_position(symbol))
+    
+    def get_all_positions(self) -> Dict[str, Dict]:
+        """Get every pair's position with one request (per-symbol requests if it fails)"""
+        raw = self.client.get_all_positions()
+        if raw is None:
+            positions = {symbol: self.get_position(symbol) for symbol in self.trading_pairs}
+        else:
+            by_symbol = {p.get('symbol'): p for p in raw}
+            positions = {symbol: self._parse_position(by_symbol.get(symbol)) for symbol in self.trading_pairs}
+        
+        self._open_symbols = {symbol for symbol, position in positions.items() if position['size'] > 0}
+        return positions
+    
+    def get_all_prices(self) -> Dict[str, float]:
+        """Get every pair's last price from the feed, fetching tickers only for pairs it lacks"""
+        prices = {symbol: self.feed.get_price(symbol) for symbol in self.trading_pairs}
+        missing = [symbol for symbol, price in prices.items() if not price]
+        if not missing:
+            return prices
+        
+        tickers = self._executor.map(self.client.get_ticker, missing)
+        for symbol, ticker in zip(missing, tickers):
+            prices[symbol] = _safe_float(ticker.get('lastPrice')) if ticker else 0.0
+        return prices
+    
+    @staticmethod
+    def _parse_position(position: Dict) -> Dict:
+        """Convert a raw position record into the bot's position dict"""
         if not position:
             return {'side': 'None', 'size': 0}
         
-        def safe_float(value, default=0.0):
-            try:
-                return float(value) if value and value != '' else default
-            except (ValueError, TypeError):
-                return default
+        fields = [position.get(key) for key in _POSITION_FLOAT_KEYS]
+        try:
+            # Happy path: all fields are numeric strings (empty -> 0)
+            size, entry_price, unrealized_pnl, leverage = [float(value or 0) for value in fields]
+        except (ValueError, TypeError):
+            size, entry_price, unrealized_pnl, leverage = [_safe_float(value) for value in fields]
         
         return {
             'side': position.get('side', 'None'),
-            'size': safe_float(position.get('size', 0)),
-            'entry_price': safe_float(position.get('avgPrice', 0)),
-            'unrealized_pnl': safe_float(position.get('unrealisedPnl', 0)),
-            'leverage': safe_float(position.get('leverage', 0))
+            'size': size,
+            'entry_price': entry_price,
+            'unrealized_pnl': unrealized_pnl,
+            'leverage': leverage
         }
     
-    def close_position(self, symbol: str) -> bool:
-        """Close position"""
-        position = self.get_position(symbol)
+    def close_position(self, symbol: str, position: Dict = None) -> bool:
+        """Close position (pass position if it was just fetched)"""
+        if position is None:
+            position = self.get_position(symbol)
         
         if position['size'] == 0:
             return True
         
         close_side = 'Sell' if position['side'] == 'Buy' else 'Buy'
         
-        logger.info(f"Closing {position['side']} on {symbol}")
+        logger.info("Closing %s on %s", position['side'], symbol)
         response = self.client.place_order(
             symbol=symbol,
             side=close_side,
@@ -171,48 +340,82 @@ class MobileTradingBot:
             reduce_only=True
         )
         
-        return response.get('retCode') == 0
+        if response.get('retCode') == 0:
+            self.invalidate_wallet_balance()
+            self._positions.pop(symbol, None)
+            self._open_symbols.discard(symbol)
+            return True
+        return False
     
-    def has_any_position(self) -> bool:
-        """Check if ANY position is open across all pairs"""
-        for symbol in self.trading_pairs:
+    def _wait_until_flat(self, symbol: str, timeout: float = 2.0, interval: float = 0.05) -> Dict:
+        """Poll a just-closed position until it is flat (or timeout) and return it"""
+        deadline = time.monotonic() + timeout
+        while True:
             position = self.get_position(symbol)
-            if position['size'] > 0:
-                return True
-        return False
+            if position['size'] == 0:
+                return position
+            if time.monotonic() >= deadline:
+                logger.warning("Position on %s still open after %.1fs", symbol, timeout)
+                return position
+            time.sleep(interval)
+    
+    def has_any_position(self, positions: Dict[str, Dict] = None) -> bool:
+        """Check if ANY position is open across all pairs (pass positions if just fetched)"""
+        if positions is None:
+            positions = self.get_all_positions()
+        return any(position['size'] > 0 for position in positions.values())
     
-    def open_long(self, symbol: str) -> bool:
-        """Open long position"""
-        position = self.get_position(symbol)
+    def _ensure_leverage(self, symbol: str) -> bool:
+        """Set the pair's leverage only if it differs from what was last applied"""
+        leverage = self.leverage[symbol]
+        if self._applied_leverage.get(symbol) == leverage:
+            return True
         
-        # Close any short position first
-        if position['side'] == 'Sell' and position['size'] > 0:
-            logger.info(f"Closing SHORT position before opening LONG on {symbol}")
-            if not self.close_position(symbol):
-                logger.error(f"Failed to close short position on {symbol}")
+        if not self.client.set_leverage(symbol, leverage):
+            return False
+        self._applied_leverage[symbol] = leverage
+        return True
+    
+    def open_long(self, symbol: str, positions: Dict[str, Dict] = None) -> bool:
+        """Open long position (pass every pair's positions if they were just fetched)"""
+        return self._open(symbol, 'Buy', positions)
+    
+    def open_short(self, symbol: str, positions: Dict[str, Dict] = None) -> bool:
+        """Open short position (pass every pair's positions if they were just fetched)"""
+        return self._open(symbol, 'Sell', positions)
+    
+    def _open(self, symbol: str, side: str, positions: Dict[str, Dict] = None) -> bool:
+        """Open a position on side ('Buy' = long, 'Sell' = short), flipping an opposite one first"""
+        direction, name, opposite = (1, 'LONG', 'SHORT') if side == 'Buy' else (-1, 'SHORT', 'LONG')
+        
+        if positions is None or len(positions) < len(self.trading_pairs):
+            positions = self.get_all_positions()
+        else:
+            positions = dict(positions)  # Updated below after a flip
+        position = positions[symbol]
+        
+        # Close any opposite position first
+        if position['side'] != side and position['size'] > 0:
+            logger.info(f"Closing {opposite} position before opening {name} on {symbol}")
+            if not self.close_position(symbol, position):
+                logger.error(f"Failed to close {opposite.lower()} position on {symbol}")
                 return False
-            time.sleep(1)
+            positions[symbol] = self._wait_until_flat(symbol)
         
         # Check if ANY other position is open
-        if self.has_any_position():
-            logger.info(f"❌ Already have an open position elsewhere, cannot open LONG on {symbol}")
+        if self.has_any_position(positions):
+            logger.info(f"❌ Already have an open position elsewhere, cannot open {name} on {symbol}")
             return False
         
         usd_amount = self.calculate_position_size(symbol)
-        leverage = self.config['leverage'].get(symbol, 35)
+        leverage = self.leverage[symbol]
         
-        # Set leverage
-        if not self.client.set_leverage(symbol, leverage):
+        # Set leverage (skipped when it is already applied)
+        if not self._ensure_leverage(symbol):
             logger.error(f"Failed to set leverage for {symbol}")
             return False
         
-        qty = self.client.calculate_qty(symbol, usd_amount, leverage)
-        
-        if qty == 0:
-            logger.error(f"Could not calculate quantity for {symbol}")
-            return False
-        
-        # Get current price for SL/TP calculation
+        # Get current price for sizing and SL/TP calculation
         ticker = self.client.get_ticker(symbol)
         if not ticker:
             logger.error(f"Failed to get ticker for {symbol}")
@@ -223,203 +426,258 @@ class MobileTradingBot:
             logger.error(f"Invalid price for {symbol}")
             return False
         
+        qty = self.client.calculate_qty(symbol, usd_amount, leverage, price=entry_price)
+        
+        if qty == 0:
+            logger.error(f"Could not calculate quantity for {symbol}")
+            return False
+        
         stop_loss_price = None
         take_profit_price = None
         
-        if self.config.get('enable_stop_loss', True):
-            price_move_percent = self.config.get('stop_loss_percent', 37) / leverage
-            stop_loss_price = entry_price * (1 - price_move_percent / 100)
+        # SL sits against the position's direction, TP with it
+        if self.enable_sl:
+            price_move_percent = self.sl_pct / leverage
+            stop_loss_price = entry_price * (1 - direction * price_move_percent / 100)
         
-        if self.config.get('enable_take_profit', True):
-            price_move_percent = self.config.get('take_profit_percent', 150) / leverage
-            take_profit_price = entry_price * (1 + price_move_percent / 100)
+        if self.enable_tp:
+            price_move_percent = self.tp_pct / leverage
+            take_profit_price = entry_price * (1 + direction * price_move_percent / 100)
         
-        logger.info(f"🟢 LONG {symbol} - ${usd_amount:.2f} ({qty}) @ {leverage}x")
+        logger.info(f"{'🟢' if side == 'Buy' else '🔴'} {name} {symbol} - ${usd_amount:.2f} ({qty}) @ {leverage}x")
         if stop_loss_price:
-            actual_price_move = ((entry_price - stop_loss_price) / entry_price) * 100
-            logger.info(f"   ⛔ SL: ${stop_loss_price:.2f} ({actual_price_move:.2f}% price = {self.config.get('stop_loss_percent', 37)}% ROI)")
+            actual_price_move = abs(entry_price - stop_loss_price) / entry_price * 100
+            logger.info(f"   ⛔ SL: ${stop_loss_price:.2f} ({actual_price_move:.2f}% price = {self.sl_pct:g}% ROI)")
         if take_profit_price:
-            actual_price_move = ((take_profit_price - entry_price) / entry_price) * 100
-            logger.info(f"   🎯 TP: ${take_profit_price:.2f} ({actual_price_move:.2f}% price = {self.config.get('take_profit_percent', 150)}% ROI)")
+            actual_price_move = abs(take_profit_price - entry_price) / entry_price * 100
+            logger.info(f"   🎯 TP: ${take_profit_price:.2f} ({actual_price_move:.2f}% price = {self.tp_pct:g}% ROI)")
         
         response = self.client.place_order(
             symbol=symbol,
-            side='Buy',
+            side=side,
             qty=qty,
             stop_loss=stop_loss_price,
             take_profit=take_profit_price
         )
         
-        return response.get('retCode') == 0
+        if response.get('retCode') == 0:
+            self.invalidate_wallet_balance()
+            self._open_symbols.add(symbol)
+            self._snapshot = None  # Shows the pair as flat - the next status refetches
+            return True
+        return False
     
-    def open_short(self, symbol: str) -> bool:
-        """Open short position"""
-        position = self.get_position(symbol)
-        
-        # Close any long position first
-        if position['side'] == 'Buy' and position['size'] > 0:
-            logger.info(f"Closing LONG position before opening SHORT on {symbol}")
-            if not self.close_position(symbol):
-                logger.error(f"Failed to close long position on {symbol}")
-                return False
-            time.sleep(1)
-        
-        # Check if ANY other position is open
-        if self.has_any_position():
-            logger.info(f"❌ Already have an open position elsewhere, cannot open SHORT on {symbol}")
-            return False
-        
-        usd_amount = self.calculate_position_size(symbol)
-        leverage = self.config['leverage'].get(symbol, 35)
-        
-        # Set leverage
-        if not self.client.set_leverage(symbol, leverage):
-            logger.error(f"Failed to set leverage for {symbol}")
-            return False
-        
-        qty = self.client.calculate_qty(symbol, usd_amount, leverage)
+    async def _fetch_positions_and_prices(self) -> Tuple[Dict[str, Dict], Dict[str, float]]:
+        """Fetch every pair's position and price - one batched request each, sent concurrently"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            loop.run_in_executor(self._executor, self.get_all_positions),
+            loop.run_in_executor(self._executor, self.get_all_prices)
+        )
+    
+    async def check_stop_loss(self):
+        """Check stop loss for all positions"""
+        if not self.enable_sl:
+            return
         
-        if qty == 0:
-            logger.error(f"Could not calculate quantity for {symbol}")
-            return False
+        if not self._open_symbols:
+            # Flat everywhere - no requests; signals fetch positions if they trade
+            self._positions = {}
+            return
         
-        # Get current price for SL/TP calculation
-        ticker = self.client.get_ticker(symbol)
-        if not ticker:
-            logger.error(f"Failed to get ticker for {symbol}")
-            return False
+        positions, prices = await self._fetch_positions_and_prices()
+        self._positions = positions
+        self._snapshot = (time.monotonic(), positions, prices)
+        
+        closes = [
+            self._trigger_stop_loss(symbol, positions[symbol], roi)
+            for symbol, roi in self._stop_loss_hits(positions, prices)
+        ]
+        closes = [future for future in closes if future is not None]
+        if closes:
+            await asyncio.gather(*closes)
+    
+    def _trigger_stop_loss(self, symbol: str, position: Dict, roi: float):
+        """Log and close a stop-loss hit unless a close is already in flight; returns the close future"""
+        if symbol in self._sl_pending:
+            return None
+        
+        self._sl_pending.add(symbol)
+        logger.warning("🛑 STOP LOSS %s - ROI: %.2f%%", symbol, roi)
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self.close_position, symbol, position)
+        future.add_done_callback(lambda _: self._sl_pending.discard(symbol))
+        return future
+    
+    def _stop_loss_hits(self, positions: Dict[str, Dict], prices: Dict[str, float]) -> List[Tuple[str, float]]:
+        """Pairs whose position has hit the stop loss, from one vectorized ROI pass over all pairs"""
+        pairs = self.trading_pairs
+        size = np.array([positions[symbol]['size'] for symbol in pairs], dtype=float)
+        entry = np.array([positions[symbol].get('entry_price', 0.0) for symbol in pairs], dtype=float)
+        lev = np.array([positions[symbol].get('leverage', 0.0) for symbol in pairs], dtype=float)
+        sign = np.array([1.0 if positions[symbol]['side'] == 'Buy' else -1.0 for symbol in pairs])
+        price = np.array([prices[symbol] for symbol in pairs], dtype=float)
+        
+        # Same formula as _position_roi; flat or invalid rows become NaN and never trigger
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = sign * (price - entry) / entry * lev * 100
+        roi[(size == 0) | (entry == 0) | (price == 0) | (lev == 0)] = np.nan
+        
+        return [(pairs[i], float(roi[i])) for i in np.flatnonzero(roi <= -self.sl_pct)]
+    
+    def _on_ticker(self, symbol: str, price: float):
+        """WebSocket ticker push - check the symbol's stop loss from memory"""
+        if not self.enable_sl or symbol not in self._open_symbols or symbol in self._sl_pending:
+            return
         
-        entry_price = float(ticker.get('lastPrice', 0))
-        if entry_price == 0:
-            logger.error(f"Invalid price for {symbol}")
-            return False
+        position = self._positions.get(symbol)
+        if not position:
+            return
         
-        stop_loss_price = None
-        take_profit_price = None
+        roi = self._position_roi(position, price)
+        if roi is None:
+            return
         
-        if self.config.get('enable_stop_loss', True):
-            price_move_percent = self.config.get('stop_loss_percent', 37) / leverage
-            stop_loss_price = entry_price * (1 + price_move_percent / 100)
+        if roi <= -self.sl_pct:
+            self._trigger_stop_loss(symbol, position, roi)
+        elif (roi <= -self.sl_pct * self.WAKE_ROI_FRACTION
+                and time.monotonic() - self._last_cycle >= self.MIN_CYCLE_GAP):
+            # Refresh positions early when one is heading toward its stop loss
+            self._wake.set()
+    
+    @staticmethod
+    def _position_roi(position: Dict, current_price: float):
+        """ROI percentage of a position at current_price (None if it can't be computed)"""
+        if position['size'] == 0:
+            return None
         
-        if self.config.get('enable_take_profit', True):
-            price_move_percent = self.config.get('take_profit_percent', 150) / leverage
-            take_profit_price = entry_price * (1 - price_move_percent / 100)
+        entry_price = position['entry_price']
+        leverage = position['leverage']
         
-        logger.info(f"🔴 SHORT {symbol} - ${usd_amount:.2f} ({qty}) @ {leverage}x")
-        if stop_loss_price:
-            actual_price_move = ((stop_loss_price - entry_price) / entry_price) * 100
-            logger.info(f"   ⛔ SL: ${stop_loss_price:.2f} ({actual_price_move:.2f}% price = {self.config.get('stop_loss_percent', 37)}% ROI)")
-        if take_profit_price:
-            actual_price_move = ((entry_price - take_profit_price) / entry_price) * 100
-            logger.info(f"   🎯 TP: ${take_profit_price:.2f} ({actual_price_move:.2f}% price = {self.config.get('take_profit_percent', 150)}% ROI)")
+        if entry_price == 0 or current_price == 0 or leverage == 0:
+            return None
         
-        response = self.client.place_order(
-            symbol=symbol,
-            side='Sell',
-            qty=qty,
-            stop_loss=stop_loss_price,
-            take_profit=take_profit_price
+        if position['side'] == 'Buy':  # Long position
+            return ((current_price - entry_price) / entry_price) * leverage * 100
+        return ((entry_price - current_price) / entry_price) * leverage * 100  # Short position
+    
+    async def check_signals(self):
+        """Check trading signals (candles for all pairs are fetched concurrently)"""
+        loop = asyncio.get_running_loop()
+        signals = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, self._update_signal_state, symbol) for symbol in self.trading_pairs),
+            return_exceptions=True
         )
         
-        return response.get('retCode') == 0
-    
-    def check_stop_loss(self):
-        """Check stop loss for all positions"""
-        if not self.config['enable_stop_loss']:
-            return
+        # Positions from this cycle's stop-loss check; refetched once anything trades
+        positions = self._positions
         
-        for symbol in self.trading_pairs:
-            try:
-                position = self.get_position(symbol)
-                
-                if position['size'] == 0:
-                    continue
-                
-                ticker = self.client.get_ticker(symbol)
-                if not ticker:
-                    continue
-                
-                current_price = float(ticker.get('lastPrice', 0))
-                entry_price = position['entry_price']
-                side = position['side']
-                leverage = position['leverage']
-                
-                if entry_price == 0 or current_price == 0 or leverage == 0:
-                    continue
-                
-                # Calculate ROI percentage
-                if side == 'Buy':  # Long position
-                    roi = ((current_price - entry_price) / entry_price) * leverage * 100
-                else:  # Short position
-                    roi = ((entry_price - current_price) / entry_price) * leverage * 100
-                
-                if roi <= -self.config['stop_loss_percent']:
-                    logger.warning(f"🛑 STOP LOSS {symbol} - ROI: {roi:.2f}%")
-                    self.close_position(symbol)
-                
-            except Exception as e:
-                logger.error(f"Stop loss error {symbol}: {e}")
-    
-    def check_signals(self):
-        """Check trading signals"""
-        for symbol in self.trading_pairs:
+        # Trades stay sequential so the one-position rule holds
+        for symbol, sig in zip(self.trading_pairs, signals):
             try:
-                df = self.client.get_klines(symbol, self.config['timeframe'], limit=200)
+                if isinstance(sig, Exception):
+                    raise sig
                 
-                if df.empty:
+                if sig is None:
                     continue
                 
-                df = calculate_twin_range_filter(
-                    df,
-                    fast_period=self.config.get('twin_range_fast_period', 27),
-                    fast_range=self.config.get('twin_range_fast_range', 1.6),
-                    slow_period=self.config.get('twin_range_slow_period', 55),
-                    slow_range=self.config.get('twin_range_slow_range', 2.0)
-                )
-                
-                signal = get_latest_signal(df)
-                
-                if signal != 'none' and signal != self.last_signals[symbol]:
-                    self.last_signals[symbol] = signal
+                if sig != 'none' and sig != self.last_signals[symbol]:
+                    self.last_signals[symbol] = sig
                     
-                    if signal == 'long':
-                        self.open_long(symbol)
-                    elif signal == 'short':
-                        self.open_short(symbol)
+                    if sig == 'long':
+                        await loop.run_in_executor(self._executor, self.open_long, symbol, positions)
+                    elif sig == 'short':
+                        await loop.run_in_executor(self._executor, self.open_short, symbol, positions)
+                    positions = None
                     
-                    self.save_state()
-                elif signal == 'none':
+                    self.mark_state_dirty()
+                elif sig == 'none':
                     self.last_signals[symbol] = 'none'
                 
             except Exception as e:
-                logger.error(f"Error {symbol}: {e}")
+                logger.error("Error %s: %s", symbol, e)
+    
+    def _update_signal_state(self, symbol: str):
+        """Feed newly closed candles into the symbol's filter; None if nothing closed"""
+        # Only the newest candles are fetched; older ones are already in the filter state
+        klines = self.client.get_klines_np(symbol, self.timeframe, limit=self.KLINE_UPDATE_SIZE)
+        
+        if not klines:
+            return None
+        
+        # The last candle is still forming
+        starts = klines['timestamp'][:-1]
+        closes = klines['close'][:-1]
+        last_start = self._last_bar_start.get(symbol)
+        new_bars = starts > last_start if last_start is not None else np.ones(len(starts), dtype=bool)
+        
+        if not new_bars.any():
+            return None  # No candle closed since the last check
+        
+        if new_bars.all():
+            # Every fetched candle is new, so some may be missing - rebuild from history
+            return self._seed_signal_state(symbol)
+        
+        state = self._trf_states[symbol]
+        for close in closes[new_bars].tolist():
+            sig = state.update(close)
+        self._last_bar_start[symbol] = int(starts[-1])
+        return sig
+    
+    def _seed_signal_state(self, symbol: str):
+        """Build the symbol's filter state from REST history and return its signal"""
+        klines = self.client.get_klines_np(symbol, self.timeframe, limit=self.KLINE_SEED_SIZE)
+        if not klines or len(klines['close']) < 2:
+            return None
+        
+        # The last candle is still forming
+        state = TwinRangeFilterState.from_closes(
+            klines['close'][:-1].tolist(),
+            **self.trf_params
+        )
+        self._trf_states[symbol] = state
+        self._last_bar_start[symbol] = int(klines['timestamp'][-2])
+        return state.signal
     
-    def print_status(self):
-        """Print current status"""
+    async def print_status(self):
+        """Print current status from the last check cycle (fetched if there is none or it is old)"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         logger.info("=" * 50)
-        self.update_wallet_balance()
-        logger.info(f"💰 Balance: ${self.wallet_balance:.2f}")
+        # Stop-loss checks skip fetching while flat, so the snapshot can be arbitrarily old
+        if self._snapshot is None or time.monotonic() - self._snapshot[0] > self.SNAPSHOT_MAX_AGE:
+            loop = asyncio.get_running_loop()
+            _, (positions, prices) = await asyncio.gather(
+                loop.run_in_executor(self._executor, self.update_wallet_balance),
+                self._fetch_positions_and_prices()
+            )
+            self._snapshot = (time.monotonic(), positions, prices)
+        else:
+            if not self._balance_cache[0]:
+                # No balance since startup or the last fill; otherwise the cached one is shown
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.update_wallet_balance)
+            
+            _, positions, prices = self._snapshot
+            # Streamed prices are newer than the snapshot's while the feed is up
+            prices = {symbol: self.feed.get_price(symbol) or prices.get(symbol, 0.0) for symbol in self.trading_pairs}
+        logger.info("💰 Balance: $%.2f", self.wallet_balance)
         
         total_pnl = 0.0
         active = 0
         
         for symbol in self.trading_pairs:
-            pos = self.get_position(symbol)
-            ticker = self.client.get_ticker(symbol)
-            price = float(ticker.get('lastPrice', 0)) if ticker else 0
+            # Closed since the snapshot if it has left the open set
+            pos = positions.get(symbol) if symbol in self._open_symbols else None
+            price = prices.get(symbol, 0.0)
             
-            if pos['size'] > 0:
-                pnl_sign = '+' if pos['unrealized_pnl'] >= 0 else ''
-                logger.info(
-                    f"{symbol}: {pos['side']} ${pos['unrealized_pnl']:.2f} "
-                    f"@ {price:.4f}"
-                )
+            if pos and pos['size'] > 0:
+                logger.info("%s: %s $%.2f @ %.4f", symbol, pos['side'], pos['unrealized_pnl'], price)
                 total_pnl += pos['unrealized_pnl']
                 active += 1
             else:
-                logger.info(f"{symbol}: No position @ {price:.4f}")
+                logger.info("%s: No position @ %.4f", symbol, price)
         
-        logger.info(f"📊 Active: {active} | Total PnL: ${total_pnl:.2f}")
+        logger.info("📊 Active: %d | Total PnL: $%.2f", active, total_pnl)
         logger.info("=" * 50)
     
     def run(self):
@@ -433,37 +691,64 @@ class MobileTradingBot:
         
         # Setup
         self.setup_leverage()
-        self.print_status()
         self.running = True
         
-        logger.info(f"⏰ Checking every {self.config['check_interval']}s")
+        logger.info("⏰ Checking every %gs", self.check_interval)
         logger.info("Press Ctrl+C to stop")
         
-        last_status = time.time()
-        
         try:
-            while self.running:
-                self.check_stop_loss()
-                self.check_signals()
-                
-                # Print status every 5 minutes
-                if time.time() - last_status > 300:
-                    self.print_status()
-                    last_status = time.time()
-                
-                time.sleep(self.config['check_interval'])
-                
+            asyncio.run(self._run())
+            
         except KeyboardInterrupt:
             logger.info("\n👋 Stopping bot...")
             self.running = False
         except Exception as e:
-            logger.error(f"Bot error: {e}")
+            logger.error("Bot error: %s", e)
             self.running = False
         
-        self.save_state()
-        self.print_status()
+        self.mark_state_dirty()
+        self.flush_state(force=True)
+        asyncio.run(self.print_status())
+        self._executor.shutdown(wait=False)
         logger.info("✓ Bot stopped")
-
+    
+    async def _run(self):
+        """Run the price feed alongside the check loop"""
+        feed_task = asyncio.create_task(self.feed.run())
+        try:
+            await self._check_loop()
+        finally:
+            await self.feed.stop()
+            feed_task.cancel()
+    
+    async def _check_loop(self):
+        """Main loop body; per-symbol fetches fan out concurrently"""
+        await self.print_status()
+        last_status = time.time()
+        
+        next_check = 0.0
+        
+        while self.running:
+            self._last_cycle = time.monotonic()
+            await self.check_stop_loss()
+            
+            # Early wakes only re-check stop losses; signals keep the check_interval schedule
+            if self._last_cycle >= next_check:
+                next_check = self._last_cycle + self.check_interval
+                await self.check_signals()
+                self.flush_state()
+                
+                # Print status every 5 minutes
+                if time.time() - last_status > 300:
+                    await self.print_status()
+                    last_status = time.time()
+            
+            # Sleep until the next check, or until a ticker push asks for an early stop-loss check
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, next_check - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
 
 def main():
     """Main entry point"""
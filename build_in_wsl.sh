@@ -35,8 +35,6 @@ cd ~/bybit-bot-build
 echo ""
 echo "Step 5: Copying project files..."
 cp -r /mnt/d/Documents/Autobot/android_app/* .
-cp /mnt/d/Documents/Autobot/bybit_client_lite.py .
-cp /mnt/d/Documents/Autobot/twin_range_filter_lite.py .
 
 # Build APK
 echo ""
@@ -7,10 +7,19 @@ import time
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
+import numpy as np
 import urllib3
+from urllib3.util.retry import Retry
+
+# Faster response parsing when orjson is available
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 # Lightweight pandas-free DataFrame for Termux compatibility
 try:
@@ -70,7 +79,13 @@ class BybitClient:
     MAINNET_URL = "https://api.bybit.com"
     TESTNET_URL = "https://api-testnet.bybit.com"
     
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        testnet: bool = True,
+        session: Optional[requests.Session] = None
+    ):
         """
         Initialize Bybit client
         
@@ -78,12 +93,34 @@ class BybitClient:
             api_key: Bybit API key
             api_secret: Bybit API secret
             testnet: Use testnet if True, mainnet if False
+            session: Shared HTTP session (a keep-alive session is created if None)
         """
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_url = self.TESTNET_URL if testnet else self.MAINNET_URL
         self.recv_window = 60000  # Increased to 60 seconds to handle clock skew and network delays
         
+        # One pooled session for the client's lifetime, so TCP/TLS setup is paid once per connection
+        # (Retry only covers idempotent methods, so orders are never resent)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=32,
+                max_retries=Retry(total=3, backoff_factor=0.3)
+            ))
+        self._session = session
+        
+        # Optional bybit_ws.BybitWSTrade; orders go over it while it is connected
+        self.ws_trade = None
+        
+        # symbol -> instrument info; lot size and leverage limits are static per symbol
+        self._instrument_cache: Dict[str, Dict] = {}
+    
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        self._session.close()
+    
     def _generate_signature(self, params: Dict[str, Any]) -> str:
         """Generate HMAC signature for request"""
         param_str = '&'.join([f"{k}={v}" for k, v in sorted(params.items())])
@@ -121,11 +158,11 @@ class BybitClient:
         
         try:
             if method == 'GET':
-                response = requests.get(url, params=params, timeout=10, verify=False)
+                response = self._session.get(url, params=params, timeout=10, verify=False)
             else:
-                response = requests.post(url, json=params, timeout=10, verify=False)
+                response = self._session.post(url, json=params, timeout=10, verify=False)
             
-            data = response.json()
+            data = _loads(response.content)
             
             if data.get('retCode') != 0 and data.get('retCode') != 110043:
                 logger.error(f"API Error: {data.get('retMsg')} (Code: {data.get('retCode')})")
@@ -135,9 +172,17 @@ class BybitClient:
             logger.error(f"Request failed: {e}")
             return {'retCode': -1, 'retMsg': str(e)}
     
-    def _request_v5(self, method: str, endpoint: str, params: Dict = None, signed: bool = False) -> Dict:
+    def _request_v5(
+        self,
+        method: str,
+        endpoint: str,
+        params: Dict = None,
+        signed: bool = False,
+        quiet_codes: tuple = ()
+    ) -> Dict:
         """
         Make V5 API request with proper authentication
+        (errors with a retCode in quiet_codes are left for the caller to log)
         """
         url = f"{self.base_url}{endpoint}"
         params = params or {}
@@ -170,13 +215,14 @@ class BybitClient:
         
         try:
             if method == 'GET':
-                response = requests.get(url, params=params, headers=headers, timeout=10, verify=False)
+                response = self._session.get(url, params=params, headers=headers, timeout=10, verify=False)
             else:
-                response = requests.post(url, json=params, headers=headers, timeout=10, verify=False)
+                response = self._session.post(url, json=params, headers=headers, timeout=10, verify=False)
             
-            data = response.json()
+            data = _loads(response.content)
             
-            if data.get('retCode') != 0 and data.get('retCode') != 110043:
+            ret_code = data.get('retCode')
+            if ret_code != 0 and ret_code != 110043 and ret_code not in quiet_codes:
                 logger.error(f"API Error: {data.get('retMsg')} (Code: {data.get('retCode')})")
             
             return data
@@ -232,6 +278,47 @@ class BybitClient:
         
         return df
     
+    def get_klines_np(self, symbol: str, interval: str, limit: int = 200) -> Dict[str, np.ndarray]:
+        """
+        Get candlestick/kline data as plain numpy arrays (no DataFrame)
+        
+        Args:
+            symbol: Trading pair (e.g., BTCUSDT)
+            interval: Timeframe (1, 3, 5, 15, 30, 60, 120, 240, 360, 720, D, W, M)
+            limit: Number of candles to fetch (max 200)
+        
+        Returns:
+            Dict of arrays keyed 'timestamp' (ms start times), 'open', 'high',
+            'low', 'close' and 'volume', oldest candle first; empty on error
+        """
+        endpoint = "/v5/market/kline"
+        params = {
+            'category': 'linear',
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit
+        }
+        
+        response = self._request_v5('GET', endpoint, params)
+        
+        if response.get('retCode') != 0:
+            logger.error(f"Failed to get klines: {response.get('retMsg')}")
+            return {}
+        
+        data = response.get('result', {}).get('list', [])
+        
+        if not data:
+            return {}
+        
+        # Bybit lists candles newest first
+        data.reverse()
+        count = len(data)
+        klines = {'timestamp': np.fromiter((int(row[0]) for row in data), dtype=np.int64, count=count)}
+        for col, name in enumerate(('open', 'high', 'low', 'close', 'volume'), start=1):
+            klines[name] = np.fromiter((float(row[col]) for row in data), dtype=np.float64, count=count)
+        
+        return klines
+    
     def get_position(self, symbol: str) -> Dict:
         """
         Get current position for a symbol
@@ -256,18 +343,27 @@ class BybitClient:
         positions = response.get('result', {}).get('list', [])
         return positions[0] if positions else {}
     
-    def get_all_positions(self) -> List[Dict]:
-        """Get all open positions"""
+    def get_all_positions(self, category: str = 'linear', settle_coin: str = 'USDT') -> Optional[List[Dict]]:
+        """
+        Get all open positions in one request
+        
+        Args:
+            category: Product type
+            settle_coin: Settlement coin to list positions for
+        
+        Returns:
+            List of position data dictionaries, or None if the request failed
+        """
         endpoint = "/v5/position/list"
         params = {
-            'category': 'linear',
-            'settleCoin': 'USDT'
+            'category': category,
+            'settleCoin': settle_coin
         }
         
         response = self._request_v5('GET', endpoint, params, signed=True)
         
         if response.get('retCode') != 0:
-            return []
+            return None
         
         return response.get('result', {}).get('list', [])
     
@@ -359,22 +455,53 @@ class BybitClient:
         # Bybit doesn't support SL/TP in market order creation
         # We'll set them separately using set_trading_stop
         
-        response = self._request_v5('POST', endpoint, params, signed=True)
+        response = self._send_order(endpoint, params)
         
         if response.get('retCode') == 0:
             logger.info(f"✅ Order placed: {side} {qty} {symbol}")
             
             # Now set SL/TP using trading-stop endpoint
-            if stop_loss or take_profit:
-                time.sleep(1)  # Small delay to ensure position is open
-                self.set_trading_stop(symbol, stop_loss, take_profit)
+            # (retries on 110001 until the fill shows up as a position)
+            if (stop_loss or take_profit) and not self.set_trading_stop(symbol, stop_loss, take_profit):
+                # Never leave a position open without its protection on the exchange
+                logger.critical(f"🚨 SL/TP could not be set for {symbol} - closing the position")
+                close = self.close_position(symbol)
+                if close.get('retCode') != 0:
+                    logger.critical(f"🚨 {symbol} is OPEN WITHOUT SL/TP - close failed: {close.get('retMsg')}")
+                return {'retCode': -1, 'retMsg': 'SL/TP could not be set; position closed', 'result': response.get('result', {})}
         else:
             logger.error(f"❌ Order failed: {response.get('retMsg')}")
         
         return response
     
-    def set_trading_stop(self, symbol: str, stop_loss: float = None, take_profit: float = None) -> bool:
-        """Set stop loss and take profit for an open position"""
+    def _send_order(self, endpoint: str, params: Dict) -> Dict:
+        """Submit an order over the trade WebSocket when connected, otherwise over REST"""
+        if self.ws_trade is not None and self.ws_trade.connected:
+            try:
+                return self.ws_trade.request_threadsafe('order.create', params)
+            except Exception as e:
+                # Only ConnectionError (raised before sending) is safe to resend over REST;
+                # timeouts and mid-flight disconnects may have been filled already
+                if not isinstance(e, ConnectionError):
+                    logger.error(f"WebSocket order failed: {e}")
+                    return {'retCode': -1, 'retMsg': str(e)}
+                logger.warning(f"Trade WebSocket unavailable ({e}) - sending order over REST")
+        
+        return self._request_v5('POST', endpoint, params, signed=True)
+    
+    def set_trading_stop(
+        self,
+        symbol: str,
+        stop_loss: float = None,
+        take_profit: float = None,
+        timeout: float = 30.0
+    ) -> bool:
+        """
+        Set stop loss and take profit for an open position
+        
+        While the fill isn't visible as a position yet (110001) the request is
+        retried, polling fast at first and backing off to every 2s until timeout.
+        """
         if not stop_loss and not take_profit:
             logger.debug("No SL/TP to set")
             return True
@@ -394,15 +521,21 @@ class BybitClient:
             params['takeProfit'] = str(round(take_profit, 4))
             logger.info(f"  🎯 TP set: ${take_profit:.4f}")
         
-        response = self._request_v5('POST', endpoint, params, signed=True)
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            # 110001 (position not yet visible) is expected right after a fill, so it isn't logged as an error
+            response = self._request_v5('POST', endpoint, params, signed=True, quiet_codes=(110001,))
+            
+            if response.get('retCode') != 110001 or time.monotonic() + delay > deadline:  # Position not exist
+                break
+            logger.debug(f"Position not yet available for {symbol}, retrying SL/TP in {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
         
         if response.get('retCode') == 0:
             logger.info(f"✅ SL/TP configured successfully for {symbol}")
             return True
-        elif response.get('retCode') == 110001:  # Position not exist
-            logger.warning(f"⚠️ Position not yet available, retrying in 2 seconds...")
-            time.sleep(2)
-            return self.set_trading_stop(symbol, stop_loss, take_profit)
         else:
             logger.error(f"❌ Failed to set SL/TP: {response.get('retMsg')} (Code: {response.get('retCode')})")
             return False
@@ -457,7 +590,11 @@ class BybitClient:
         return tickers[0] if tickers else {}
     
     def get_instrument_info(self, symbol: str) -> Dict:
-        """Get trading instrument info (min qty, tick size, etc.)"""
+        """Get trading instrument info (min qty, tick size, etc.), cached after the first fetch"""
+        cached = self._instrument_cache.get(symbol)
+        if cached is not None:
+            return cached
+        
         endpoint = "/v5/market/instruments-info"
         params = {
             'category': 'linear',
@@ -470,7 +607,12 @@ class BybitClient:
             return {}
         
         instruments = response.get('result', {}).get('list', [])
-        return instruments[0] if instruments else {}
+        if not instruments:
+            return {}
+        
+        # Failed lookups are not cached so they are retried next time
+        self._instrument_cache[symbol] = instruments[0]
+        return instruments[0]
     
     def get_max_leverage(self, symbol: str) -> int:
         """Get maximum leverage for a symbol"""
@@ -482,7 +624,13 @@ class BybitClient:
         max_leverage = leverage_filter.get('maxLeverage', '10')
         return int(float(max_leverage))
     
-    def calculate_qty(self, symbol: str, usd_amount: float, leverage: int = 1) -> float:
+    def calculate_qty(
+        self,
+        symbol: str,
+        usd_amount: float,
+        leverage: int = 1,
+        price: Optional[float] = None
+    ) -> float:
         """
         Calculate order quantity from USD amount
         
@@ -490,17 +638,21 @@ class BybitClient:
             symbol: Trading pair
             usd_amount: Amount in USD
             leverage: Leverage to use
+            price: Current price if the caller already has one (fetched otherwise)
         
         Returns:
             Quantity to order
         """
-        ticker = self.get_ticker(symbol)
         instrument = self.get_instrument_info(symbol)
         
-        if not ticker or not instrument:
+        if not instrument:
             return 0
         
-        price = float(ticker.get('lastPrice', 0))
+        if not price:
+            ticker = self.get_ticker(symbol)
+            if not ticker:
+                return 0
+            price = float(ticker.get('lastPrice', 0))
         
         if price == 0:
             return 0
@@ -525,6 +677,32 @@ class BybitClient:
         
         return qty
     
+    def measure_latency(self, samples: int = 3) -> float:
+        """
+        Measure round-trip time to the API
+        
+        Args:
+            samples: Number of timed requests (after one warm-up request)
+        
+        Returns:
+            Best round-trip time in milliseconds, or -1 if the server was unreachable
+        """
+        url = f"{self.base_url}/v5/market/time"
+        timings = []
+        
+        try:
+            # Warm-up so connection setup isn't counted
+            self._session.get(url, timeout=10, verify=False)
+            for _ in range(samples):
+                start = time.perf_counter()
+                self._session.get(url, timeout=10, verify=False)
+                timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            logger.error(f"Latency check failed: {e}")
+            return -1
+        
+        return min(timings)
+    
     def get_wallet_balance(self) -> Dict:
         """Get wallet balance"""
         endpoint = "/v5/account/wallet-balance"
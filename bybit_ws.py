@@ -0,0 +1,309 @@
+"""
+Bybit WebSocket Clients
+BybitWSFeed streams tickers (and optionally klines) for the trading pairs over
+one public V5 connection, so prices are read from memory instead of REST.
+BybitWSTrade keeps an authenticated V5 trade connection for order placement.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+# Faster message parsing when orjson is available
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+logger = logging.getLogger(__name__)
+
+PING_INTERVAL = 20  # Bybit recommends a ping every 20 seconds
+
+
+async def _keepalive(ws):
+    """Keep a connection alive with application-level pings"""
+    while True:
+        await asyncio.sleep(PING_INTERVAL)
+        await ws.send(json.dumps({'op': 'ping'}))
+
+
+class BybitWSFeed:
+    """Public linear WebSocket feed keeping the latest price per symbol"""
+    
+    MAINNET_URL = "wss://stream.bybit.com/v5/public/linear"
+    TESTNET_URL = "wss://stream-testnet.bybit.com/v5/public/linear"
+    MAX_TOPICS_PER_REQUEST = 10
+    
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        testnet: bool = True,
+        interval: Optional[str] = None,
+        on_ticker: Optional[Callable[[str, float], None]] = None,
+        on_kline: Optional[Callable[[str, Dict], None]] = None
+    ):
+        """
+        Initialize feed
+        
+        Args:
+            symbols: Trading pairs to subscribe to
+            testnet: Use testnet stream if True, mainnet if False
+            interval: Kline interval to subscribe to (None = tickers only)
+            on_ticker: Called with (symbol, last_price) on every price update
+            on_kline: Called with (symbol, candle) for every kline update
+        """
+        self.symbols = list(symbols)
+        self.url = self.TESTNET_URL if testnet else self.MAINNET_URL
+        self.interval = interval
+        self.on_ticker = on_ticker
+        self.on_kline = on_kline
+        self.last_price: Dict[str, float] = {}
+        self.connected = False
+        self._running = False
+        self._ws = None
+    
+    @property
+    def topics(self) -> List[str]:
+        """Topics subscribed for the configured symbols"""
+        topics = [f"tickers.{symbol}" for symbol in self.symbols]
+        if self.interval:
+            topics += [f"kline.{self.interval}.{symbol}" for symbol in self.symbols]
+        return topics
+    
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Latest streamed price, or None if the feed is down or has no price yet"""
+        if not self.connected:
+            return None
+        return self.last_price.get(symbol)
+    
+    async def run(self):
+        """Connect, subscribe and dispatch messages until stop(), reconnecting on errors"""
+        if websockets is None:
+            logger.warning("websockets package not installed - prices will be polled over REST")
+            return
+        
+        self._running = True
+        delay = 1
+        
+        while self._running:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    self._ws = ws
+                    topics = self.topics
+                    for i in range(0, len(topics), self.MAX_TOPICS_PER_REQUEST):
+                        await ws.send(json.dumps({
+                            'op': 'subscribe',
+                            'args': topics[i:i + self.MAX_TOPICS_PER_REQUEST]
+                        }))
+                    
+                    self.connected = True
+                    delay = 1
+                    logger.info(f"📡 WebSocket feed connected ({len(topics)} topics)")
+                    
+                    pinger = asyncio.create_task(_keepalive(ws))
+                    try:
+                        async for raw in ws:
+                            self._handle_message(_loads(raw))
+                    finally:
+                        pinger.cancel()
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._running:
+                    logger.warning(f"WebSocket feed error: {e} - reconnecting in {delay}s")
+            finally:
+                self.connected = False
+                self._ws = None
+            
+            if self._running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+    
+    async def stop(self):
+        """Stop the feed and close the connection"""
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+    
+    def _handle_message(self, message: Dict):
+        """Update state from a ticker or kline push"""
+        topic = message.get('topic', '')
+        
+        if topic.startswith('tickers.'):
+            data = message.get('data', {})
+            symbol = data.get('symbol') or topic.split('.', 1)[1]
+            price = data.get('lastPrice')
+            # Delta updates only carry the fields that changed
+            if price:
+                self.last_price[symbol] = float(price)
+                if self.on_ticker:
+                    self.on_ticker(symbol, self.last_price[symbol])
+        
+        elif topic.startswith('kline.') and self.on_kline:
+            symbol = topic.rsplit('.', 1)[1]
+            for candle in message.get('data', []):
+                self.on_kline(symbol, candle)
+        
+        elif message.get('op') == 'subscribe' and not message.get('success', True):
+            logger.error(f"WebSocket subscription failed: {message.get('ret_msg')}")
+
+
+class BybitWSTrade:
+    """Authenticated V5 trade WebSocket for placing and cancelling orders"""
+    
+    MAINNET_URL = "wss://stream.bybit.com/v5/trade"
+    TESTNET_URL = "wss://stream-testnet.bybit.com/v5/trade"
+    RECV_WINDOW = 8000
+    
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
+        """
+        Initialize trade connection
+        
+        Args:
+            api_key: Bybit API key
+            api_secret: Bybit API secret
+            testnet: Use testnet if True, mainnet if False
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = self.TESTNET_URL if testnet else self.MAINNET_URL
+        self.connected = False
+        self._running = False
+        self._ws = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._req_ids = itertools.count(1)
+    
+    async def run(self):
+        """Connect, authenticate and dispatch responses until stop(), reconnecting on errors"""
+        if websockets is None:
+            logger.warning("websockets package not installed - orders will be sent over REST")
+            return
+        
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+        delay = 1
+        
+        while self._running:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    self._ws = ws
+                    await self._authenticate(ws)
+                    
+                    self.connected = True
+                    delay = 1
+                    logger.info("🔐 Trade WebSocket connected")
+                    
+                    pinger = asyncio.create_task(_keepalive(ws))
+                    try:
+                        async for raw in ws:
+                            self._handle_message(_loads(raw))
+                    finally:
+                        pinger.cancel()
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._running:
+                    logger.warning(f"Trade WebSocket error: {e} - reconnecting in {delay}s")
+            finally:
+                self.connected = False
+                self._ws = None
+                # Not a ConnectionError: these may have reached the exchange, so they must not be resent
+                self._fail_pending(RuntimeError("Trade WebSocket disconnected with the request in flight"))
+            
+            if self._running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+    
+    async def stop(self):
+        """Stop the connection"""
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+    
+    async def _authenticate(self, ws):
+        """Sign in with an HMAC of 'GET/realtime' + expiry"""
+        expires = int((time.time() + 10) * 1000)
+        signature = hmac.new(
+            self.api_secret.encode('utf-8'),
+            f"GET/realtime{expires}".encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+        
+        await ws.send(json.dumps({'op': 'auth', 'args': [self.api_key, expires, signature]}))
+        reply = _loads(await asyncio.wait_for(ws.recv(), timeout=10))
+        if reply.get('retCode') != 0:
+            raise ConnectionError(f"Trade WebSocket auth failed: {reply.get('retMsg')}")
+    
+    async def request(self, op: str, args: Dict[str, Any], timeout: float = 5.0) -> Dict:
+        """
+        Send a trade request and wait for its response
+        
+        Args:
+            op: Operation, e.g. 'order.create' or 'order.cancel'
+            args: Request parameters (same fields as the REST endpoint)
+            timeout: Seconds to wait for the response
+        
+        Returns:
+            Response in REST shape: {'retCode', 'retMsg', 'result'}
+        """
+        # Raised before anything is sent, so callers can safely fall back to REST
+        ws = self._ws
+        if not self.connected or ws is None:
+            raise ConnectionError("Trade WebSocket not connected")
+        
+        req_id = str(next(self._req_ids))
+        future = self._loop.create_future()
+        self._pending[req_id] = future
+        try:
+            await ws.send(json.dumps({
+                'reqId': req_id,
+                'header': {
+                    'X-BAPI-TIMESTAMP': str(int(time.time() * 1000)),
+                    'X-BAPI-RECV-WINDOW': str(self.RECV_WINDOW)
+                },
+                'op': op,
+                'args': [args]
+            }))
+            reply = await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(req_id, None)
+        
+        return {
+            'retCode': reply.get('retCode'),
+            'retMsg': reply.get('retMsg'),
+            'result': reply.get('data', {})
+        }
+    
+    def request_threadsafe(self, op: str, args: Dict[str, Any], timeout: float = 5.0) -> Dict:
+        """Blocking request() for callers on worker threads"""
+        if not self.connected or self._loop is None:
+            raise ConnectionError("Trade WebSocket not connected")
+        
+        future = asyncio.run_coroutine_threadsafe(self.request(op, args, timeout), self._loop)
+        return future.result(timeout + 1)
+    
+    def _handle_message(self, message: Dict):
+        """Resolve the pending request a response belongs to"""
+        future = self._pending.get(message.get('reqId'))
+        if future is not None and not future.done():
+            future.set_result(message)
+    
+    def _fail_pending(self, error: Exception):
+        """Fail every in-flight request, e.g. after a disconnect"""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
@@ -6,6 +6,15 @@ Based on TradingView's ta.supertrend() function
 
 import numpy as np
 
+# Numba is optional - without it the kernel below runs as plain Python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # Lightweight pandas replacement for Termux
 try:
     import pandas as pd
@@ -79,20 +88,78 @@ def calculate_atr(df: pd.DataFrame, period: int = 5) -> pd.Series:
     low = df['low']
     close = df['close']
     
-    # Calculate True Range components
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
+    prev_close = close.shift(1)
     
-    # True Range is the maximum of the three
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    # True Range is the maximum of the three components; fmax skips the
+    # missing previous close on the first bar, as DataFrame.max did
+    tr = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
     
-    # Calculate ATR as RMA (Running Moving Average) of True Range
-    atr = tr.ewm(alpha=1/period, adjust=False).mean()
+    # Calculate ATR as RMA (Running Moving Average) of True Range. No
+    # min_periods: the band recursion is seeded from the first bar and would
+    # stall on leading NaNs
+    atr = tr.ewm(alpha=1.0 / period, adjust=False).mean()
     
     return atr
 
 
+@njit(cache=True)
+def _supertrend_loop(close, basic_upper, basic_lower):
+    """
+    Final bands, supertrend line and direction (1 = up, -1 = down) per bar
+    
+    Args:
+        close: Close prices
+        basic_upper: hl2 + factor * ATR
+        basic_lower: hl2 - factor * ATR
+    
+    Returns:
+        Tuple of (final_upper, final_lower, supertrend, direction) arrays
+    """
+    n = len(close)
+    final_upper = np.empty(n)
+    final_lower = np.empty(n)
+    supertrend = np.empty(n)
+    direction = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return final_upper, final_lower, supertrend, direction
+    
+    final_upper[0] = basic_upper[0]
+    final_lower[0] = basic_lower[0]
+    supertrend[0] = basic_upper[0]
+    direction[0] = -1  # Start with downtrend
+    
+    for i in range(1, n):
+        # Final Upper Band
+        if basic_upper[i] < final_upper[i-1] or close[i-1] > final_upper[i-1]:
+            final_upper[i] = basic_upper[i]
+        else:
+            final_upper[i] = final_upper[i-1]
+        
+        # Final Lower Band
+        if basic_lower[i] > final_lower[i-1] or close[i-1] < final_lower[i-1]:
+            final_lower[i] = basic_lower[i]
+        else:
+            final_lower[i] = final_lower[i-1]
+        
+        # Supertrend direction
+        if supertrend[i-1] == final_upper[i-1]:
+            if close[i] <= final_upper[i]:
+                direction[i] = -1
+                supertrend[i] = final_upper[i]
+            else:
+                direction[i] = 1
+                supertrend[i] = final_lower[i]
+        else:  # supertrend was final_lowerband
+            if close[i] >= final_lower[i]:
+                direction[i] = 1
+                supertrend[i] = final_lower[i]
+            else:
+                direction[i] = -1
+                supertrend[i] = final_upper[i]
+    
+    return final_upper, final_lower, supertrend, direction
+
+
 def calculate_supertrend(
     df: pd.DataFrame,
     atr_period: int = 5,
@@ -119,47 +186,16 @@ def calculate_supertrend(
     basic_upperband = hl2 + (factor * atr)
     basic_lowerband = hl2 - (factor * atr)
     
-    # Initialize final bands
-    final_upperband = pd.Series(index=result.index, dtype=float)
-    final_lowerband = pd.Series(index=result.index, dtype=float)
-    supertrend = pd.Series(index=result.index, dtype=float)
-    direction = pd.Series(index=result.index, dtype=int)
-    
-    # First value
-    final_upperband.iloc[0] = basic_upperband.iloc[0]
-    final_lowerband.iloc[0] = basic_lowerband.iloc[0]
-    supertrend.iloc[0] = basic_upperband.iloc[0]
-    direction.iloc[0] = -1  # Start with downtrend
-    
-    # Calculate final bands and supertrend
-    for i in range(1, len(result)):
-        # Final Upper Band
-        if basic_upperband.iloc[i] < final_upperband.iloc[i-1] or result['close'].iloc[i-1] > final_upperband.iloc[i-1]:
-            final_upperband.iloc[i] = basic_upperband.iloc[i]
-        else:
-            final_upperband.iloc[i] = final_upperband.iloc[i-1]
-        
-        # Final Lower Band
-        if basic_lowerband.iloc[i] > final_lowerband.iloc[i-1] or result['close'].iloc[i-1] < final_lowerband.iloc[i-1]:
-            final_lowerband.iloc[i] = basic_lowerband.iloc[i]
-        else:
-            final_lowerband.iloc[i] = final_lowerband.iloc[i-1]
-        
-        # Supertrend direction
-        if supertrend.iloc[i-1] == final_upperband.iloc[i-1]:
-            if result['close'].iloc[i] <= final_upperband.iloc[i]:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = final_upperband.iloc[i]
-            else:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = final_lowerband.iloc[i]
-        else:  # supertrend was final_lowerband
-            if result['close'].iloc[i] >= final_lowerband.iloc[i]:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = final_lowerband.iloc[i]
-            else:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = final_upperband.iloc[i]
+    # Band/direction state machine runs in a compiled kernel
+    final_upper, final_lower, supertrend_values, direction_values = _supertrend_loop(
+        result['close'].to_numpy(dtype=np.float64),
+        basic_upperband.to_numpy(dtype=np.float64),
+        basic_lowerband.to_numpy(dtype=np.float64)
+    )
+    final_upperband = pd.Series(final_upper, index=result.index)
+    final_lowerband = pd.Series(final_lower, index=result.index)
+    supertrend = pd.Series(supertrend_values, index=result.index)
+    direction = pd.Series(direction_values, index=result.index)
     
     # Calculate direction change for signals
     direction_change = direction.diff()
@@ -6,6 +6,15 @@ Original: © colinmck
 
 import numpy as np
 
+# Numba is optional - without it the kernels below run as plain Python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # Lightweight pandas replacement for Termux
 try:
     import pandas as pd
@@ -162,6 +171,61 @@ def smooth_range(source: pd.Series, period: int, multiplier: float) -> pd.Series
     return smoothrng
 
 
+@njit(cache=True)
+def _range_filter_kernel(src: np.ndarray, rng: np.ndarray):
+    """Range filter plus its upward/downward counters in one pass over float64 arrays"""
+    n = len(src)
+    filt = np.empty(n)
+    upward = np.zeros(n)
+    downward = np.zeros(n)
+    if n == 0:
+        return filt, upward, downward
+    
+    filt[0] = src[0]
+    for i in range(1, n):
+        prev_filt = filt[i-1]
+        curr_src = src[i]
+        curr_rng = rng[i]
+        
+        if curr_src > prev_filt:
+            if curr_src - curr_rng < prev_filt:
+                filt[i] = prev_filt
+            else:
+                filt[i] = curr_src - curr_rng
+        else:
+            if curr_src + curr_rng > prev_filt:
+                filt[i] = prev_filt
+            else:
+                filt[i] = curr_src + curr_rng
+        
+        if filt[i] > prev_filt:
+            upward[i] = upward[i-1] + 1
+            downward[i] = 0
+        elif filt[i] < prev_filt:
+            upward[i] = 0
+            downward[i] = downward[i-1] + 1
+        else:
+            upward[i] = upward[i-1]
+            downward[i] = downward[i-1]
+    
+    return filt, upward, downward
+
+
+@njit(cache=True)
+def _cond_ini_kernel(long_cond: np.ndarray, short_cond: np.ndarray) -> np.ndarray:
+    """Carry the last long (1) / short (-1) condition forward"""
+    n = len(long_cond)
+    cond_ini = np.zeros(n, dtype=np.int64)
+    for i in range(1, n):
+        if long_cond[i]:
+            cond_ini[i] = 1
+        elif short_cond[i]:
+            cond_ini[i] = -1
+        else:
+            cond_ini[i] = cond_ini[i-1]
+    return cond_ini
+
+
 def range_filter(source: pd.Series, smooth_range: pd.Series) -> pd.Series:
     """
     Calculate Range Filter
@@ -173,26 +237,11 @@ def range_filter(source: pd.Series, smooth_range: pd.Series) -> pd.Series:
     Returns:
         Filtered price series
     """
-    rngfilt = pd.Series(index=source.index, dtype=float)
-    rngfilt.iloc[0] = source.iloc[0]
-    
-    for i in range(1, len(source)):
-        prev_filt = rngfilt.iloc[i-1]
-        curr_src = source.iloc[i]
-        curr_rng = smooth_range.iloc[i]
-        
-        if curr_src > prev_filt:
-            if curr_src - curr_rng < prev_filt:
-                rngfilt.iloc[i] = prev_filt
-            else:
-                rngfilt.iloc[i] = curr_src - curr_rng
-        else:
-            if curr_src + curr_rng > prev_filt:
-                rngfilt.iloc[i] = prev_filt
-            else:
-                rngfilt.iloc[i] = curr_src + curr_rng
-    
-    return rngfilt
+    filt, _, _ = _range_filter_kernel(
+        source.to_numpy(dtype=np.float64),
+        smooth_range.to_numpy(dtype=np.float64)
+    )
+    return pd.Series(filt, index=source.index)
 
 
 def calculate_twin_range_filter(
@@ -225,25 +274,14 @@ def calculate_twin_range_filter(
     smrng2 = smooth_range(source, slow_period, slow_range)
     smrng = (smrng1 + smrng2) / 2
     
-    # Calculate range filter
-    filt = range_filter(source, smrng)
-    
-    # Calculate upward/downward counters
-    upward = pd.Series(index=source.index, dtype=float)
-    downward = pd.Series(index=source.index, dtype=float)
-    upward.iloc[0] = 0
-    downward.iloc[0] = 0
-    
-    for i in range(1, len(filt)):
-        if filt.iloc[i] > filt.iloc[i-1]:
-            upward.iloc[i] = upward.iloc[i-1] + 1
-            downward.iloc[i] = 0
-        elif filt.iloc[i] < filt.iloc[i-1]:
-            upward.iloc[i] = 0
-            downward.iloc[i] = downward.iloc[i-1] + 1
-        else:
-            upward.iloc[i] = upward.iloc[i-1]
-            downward.iloc[i] = downward.iloc[i-1]
+    # Calculate range filter and upward/downward counters
+    filt, upward, downward = _range_filter_kernel(
+        source.to_numpy(dtype=np.float64),
+        smrng.to_numpy(dtype=np.float64)
+    )
+    filt = pd.Series(filt, index=source.index)
+    upward = pd.Series(upward, index=source.index)
+    downward = pd.Series(downward, index=source.index)
     
     # Calculate bands
     hband = filt + smrng
@@ -257,16 +295,10 @@ def calculate_twin_range_filter(
                  ((source < filt) & (source > source.shift(1)) & (downward > 0))
     
     # Calculate CondIni (condition initialization)
-    cond_ini = pd.Series(index=source.index, dtype=int)
-    cond_ini.iloc[0] = 0
-    
-    for i in range(1, len(source)):
-        if long_cond.iloc[i]:
-            cond_ini.iloc[i] = 1
-        elif short_cond.iloc[i]:
-            cond_ini.iloc[i] = -1
-        else:
-            cond_ini.iloc[i] = cond_ini.iloc[i-1]
+    cond_ini = pd.Series(
+        _cond_ini_kernel(long_cond.to_numpy(dtype=np.bool_), short_cond.to_numpy(dtype=np.bool_)),
+        index=source.index
+    )
     
     # Generate signals (only on condition change)
     long_signal = long_cond & (cond_ini.shift(1) == -1)
@@ -288,21 +320,127 @@ def calculate_twin_range_filter(
     return result
 
 
-def get_latest_signal(df: pd.DataFrame) -> str:
+class TwinRangeFilterState:
+    """
+    Incremental Twin Range Filter for a stream of closed candles
+    
+    Holds the EMA and filter state so each new close is an O(1) update instead
+    of recomputing the indicator over the whole window.
+    """
+    
+    __slots__ = (
+        'fast_range', 'slow_range', 'alphas',
+        'ema', 'prev_src', 'filt', 'upward', 'downward', 'cond_ini', 'signal'
+    )
+    
+    def __init__(
+        self,
+        fast_period: int = 27,
+        fast_range: float = 1.6,
+        slow_period: int = 55,
+        slow_range: float = 2.0
+    ):
+        self.fast_range = fast_range
+        self.slow_range = slow_range
+        # EMA smoothing factors: fast avg range, fast smooth, slow avg range, slow smooth
+        self.alphas = (
+            2 / (fast_period + 1),
+            2 / (fast_period * 2),
+            2 / (slow_period + 1),
+            2 / (slow_period * 2)
+        )
+        self.ema = [None, None, None, None]
+        self.prev_src = None
+        self.filt = None
+        self.upward = 0
+        self.downward = 0
+        self.cond_ini = 0
+        self.signal = 'none'
+    
+    @classmethod
+    def from_closes(cls, closes, **params) -> 'TwinRangeFilterState':
+        """Build a state by replaying a series of closes"""
+        state = cls(**params)
+        for close in closes:
+            state.update(float(close))
+        return state
+    
+    def _ema(self, slot: int, value: float) -> float:
+        """Advance one EMA (adjust=False, seeded with its first value)"""
+        prev = self.ema[slot]
+        alpha = self.alphas[slot]
+        self.ema[slot] = value if prev is None else (1 - alpha) * prev + alpha * value
+        return self.ema[slot]
+    
+    def update(self, src: float) -> str:
+        """
+        Add one closed candle
+        
+        Args:
+            src: Close price of the candle
+        
+        Returns:
+            'long', 'short', or 'none' for this candle
+        """
+        prev_src = self.prev_src
+        self.prev_src = src
+        if prev_src is None:
+            self.filt = src
+            return 'none'
+        
+        diff = abs(src - prev_src)
+        fast = self._ema(1, self._ema(0, diff)) * self.fast_range
+        slow = self._ema(3, self._ema(2, diff)) * self.slow_range
+        rng = (fast + slow) / 2
+        
+        prev_filt = self.filt
+        if src > prev_filt:
+            filt = prev_filt if src - rng < prev_filt else src - rng
+        else:
+            filt = prev_filt if src + rng > prev_filt else src + rng
+        self.filt = filt
+        
+        if filt > prev_filt:
+            self.upward += 1
+            self.downward = 0
+        elif filt < prev_filt:
+            self.upward = 0
+            self.downward += 1
+        
+        long_cond = src > filt and src != prev_src and self.upward > 0
+        short_cond = src < filt and src != prev_src and self.downward > 0
+        
+        prev_cond = self.cond_ini
+        if long_cond:
+            self.cond_ini = 1
+        elif short_cond:
+            self.cond_ini = -1
+        
+        if long_cond and prev_cond == -1:
+            self.signal = 'long'
+        elif short_cond and prev_cond == 1:
+            self.signal = 'short'
+        else:
+            self.signal = 'none'
+        return self.signal
+
+
+def get_latest_signal(df: pd.DataFrame, index: int = -2) -> str:
     """
     Get the latest trading signal from the DataFrame
     
     Args:
         df: DataFrame with calculated signals
+        index: Row to read (-2 skips the forming candle, -1 when df holds closed candles only)
     
     Returns:
         'long', 'short', or 'none'
     """
-    if len(df) < 2:
+    if len(df) < -index:
         return 'none'
     
     # Check the most recent completed candle (not the current forming one)
-    latest = df.iloc[-2]  # Use -2 to check completed candle
+    latest = df.iloc[index]
     
     if latest['long_signal']:
         return 'long'